@@ -1,12 +1,13 @@
 """API routers module."""
 from fastapi import APIRouter
+from fastapi.responses import ORJSONResponse
 from app.api.auth import router as auth_router
 from app.api.reports import router as reports_router
 from app.api.analysis import router as analysis_router
 from app.api.ai import router as ai_router
 
 # Main API router
-api_router = APIRouter()
+api_router = APIRouter(default_response_class=ORJSONResponse)
 
 # Include sub-routers
 api_router.include_router(auth_router, tags=["Authentication"])
@@ -2,54 +2,26 @@
 AI API endpoints.
 Server-side AI analysis using Gemini API.
 """
-import json
+import logging
+from hashlib import blake2b
 import httpx
+import orjson
+from cachetools import TTLCache
 from typing import Optional, List
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import HTTPAuthorizationCredentials
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
-from sqlmodel import Session, select
 
 from app.models import User
-from app.database import get_session
 from app.core.config import settings
-from app.core.security import decode_token, security
+from app.api.deps import get_current_user, get_http
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 
+logger = logging.getLogger(__name__)
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    session: Session = Depends(get_session)
-) -> User:
-    """Get the current authenticated user."""
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
-    # Handle missing credentials
-    if credentials is None:
-        raise credentials_exception
-    
-    token = credentials.credentials
-    payload = decode_token(token)
-    
-    if payload is None:
-        raise credentials_exception
-    
-    email: str = payload.get("sub")
-    if email is None:
-        raise credentials_exception
-    
-    statement = select(User).where(User.email == email)
-    user = session.exec(statement).first()
-    
-    if user is None:
-        raise credentials_exception
-    
-    return user
+# Upstream bodies can be large; only this much is written to the log
+_LOG_BODY_LIMIT = 2000
 
 
 class SEOAuditRequest(BaseModel):
@@ -93,10 +65,113 @@ class SEOFilesResponse(BaseModel):
     llms_txt: str
 
 
-async def call_gemini_api(prompt: str, json_response: bool = True) -> dict:
+GEMINI_API_BASE = "https://generativelanguage.googleapis.com/v1beta"
+GEMINI_MODEL = "gemini-2.0-flash"
+
+# Static instructions for each AI endpoint. These are sent as the Gemini system
+# instruction so that per-request prompts only carry the dynamic site data.
+SYSTEM_PROMPTS = {
+    "seo_audit": """You are an expert SEO consultant. Analyze the SEO data provided for a website and provide actionable recommendations.
+
+Provide your response as JSON with this exact structure:
+{
+    "checklist": ["list of 5-8 key SEO items to check"],
+    "issues": [
+        {
+            "issue_description": "Description of the issue",
+            "category": "Technical SEO|Content|On-Page|Links",
+            "impact": "High|Medium|Low",
+            "page_or_section": "Where this applies",
+            "recommendation": "How to fix it",
+            "error_or_notes": "Additional context if any"
+        }
+    ]
+}
+
+Focus on the most impactful issues first. Limit to 5-10 issues.""",
+    "performance_guide": """You are a web performance expert. Analyze the PageSpeed Insights data provided and produce a comprehensive optimization guide.
+
+Provide your response as JSON with this exact structure:
+{
+    "summary": "Brief overview of the performance state (2-3 sentences)",
+    "fixes": [
+        {
+            "title": "Fix title",
+            "severity": "High|Medium|Low",
+            "technical_explanation": "Detailed technical explanation",
+            "code_suggestion": "Example code if applicable",
+            "impact_on_seo": "How this affects SEO rankings"
+        }
+    ]
+}
+
+Prioritize fixes by impact. Include 5-8 actionable fixes.""",
+    "specific_fix": """You are a web development expert. Provide a detailed fix for the issue described.
+
+Provide your response as JSON with this exact structure:
+{
+    "explanation": "Detailed explanation of the issue and why it matters",
+    "code_example": "Code example showing the fix (if applicable)",
+    "steps": ["Step 1", "Step 2", "Step 3"]
+}
+
+Be specific and actionable.""",
+    "seo_files": """You are an SEO expert. Generate the following files for the website described:
+1. robots.txt - Standard robots.txt with appropriate rules
+2. sitemap.xml - Valid XML sitemap with the provided URLs
+3. llms.txt - A file describing the site for LLM crawlers
+
+Provide your response as JSON with this exact structure:
+{
+    "robots_txt": "Complete robots.txt content",
+    "sitemap_xml": "Complete valid XML sitemap",
+    "llms_txt": "Complete llms.txt content"
+}
+
+Make sure all files are properly formatted and valid.""",
+}
+
+
+# Keys each SYSTEM_PROMPTS entry asks the model to return; answers missing any are not cached
+_EXPECTED_KEYS = {
+    "seo_audit": ("checklist", "issues"),
+    "performance_guide": ("summary", "fixes"),
+    "specific_fix": ("explanation", "steps"),
+    "seo_files": ("robots_txt", "sitemap_xml", "llms_txt"),
+}
+
+
+# Parsed Gemini responses keyed by a hash of the full request, so re-running an
+# analysis on unchanged data within a few minutes skips the model round-trip.
+_response_cache: TTLCache = TTLCache(
+    maxsize=settings.AI_RESPONSE_CACHE_SIZE,
+    ttl=settings.AI_RESPONSE_CACHE_TTL
+)
+
+
+def _response_cache_key(prompt: str, json_response: bool, system_instruction: Optional[str]) -> str:
+    """Hash everything that determines the model output for a request."""
+    digest = blake2b(digest_size=16)
+    digest.update((system_instruction or "").encode())
+    digest.update(b"\0json\0" if json_response else b"\0text\0")
+    digest.update(prompt.encode())
+    return digest.hexdigest()
+
+
+async def call_gemini_api(
+    client: httpx.AsyncClient,
+    prompt: str,
+    json_response: bool = True,
+    prompt_key: Optional[str] = None
+) -> dict:
     """
-    Call the Gemini API with the given prompt.
+    Call the Gemini API with the given prompt using the shared HTTP client.
+    
+    ``prompt_key`` selects the SYSTEM_PROMPTS entry sent as system instruction.
+    Well-formed results are cached for identical requests.
     """
+    system_instruction = SYSTEM_PROMPTS[prompt_key] if prompt_key else None
+    
     api_key = settings.GEMINI_API_KEY
     
     if not api_key:
@@ -105,60 +180,93 @@ async def call_gemini_api(prompt: str, json_response: bool = True) -> dict:
             detail="Gemini API key not configured"
         )
     
+    cache_key = _response_cache_key(prompt, json_response, system_instruction)
+    cached = _response_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     text = None  # Initialize text for error handling
     try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={api_key}"
-            
-            payload = {
-                "contents": [{
-                    "parts": [{"text": prompt}]
-                }],
-                "generationConfig": {
-                    "temperature": 0.7,
-                    "maxOutputTokens": 4096,
-                }
+        url = f"{GEMINI_API_BASE}/models/{GEMINI_MODEL}:generateContent?key={api_key}"
+        
+        payload = {
+            "contents": [{
+                "parts": [{"text": prompt}]
+            }],
+            "generationConfig": {
+                "temperature": 0.7,
+                "maxOutputTokens": 4096,
             }
-            
-            if json_response:
-                payload["generationConfig"]["responseMimeType"] = "application/json"
-            
-            response = await client.post(url, json=payload)
-            
-            if response.status_code != 200:
-                print(f"--- GEMINI API ERROR ---\nStatus: {response.status_code}\nBody: {response.text}\n--- END ERROR ---")
-                raise HTTPException(
-                    status_code=status.HTTP_502_BAD_GATEWAY,
-                    detail=f"Gemini API error: {response.text}"
-                )
-            
-            data = response.json()
-            
-            # Safely extract text from response
+        }
+        
+        if json_response:
+            payload["generationConfig"]["responseMimeType"] = "application/json"
+        
+        if system_instruction:
+            payload["systemInstruction"] = {"parts": [{"text": system_instruction}]}
+        
+        response = await client.post(url, json=payload)
+        
+        if response.status_code != 200:
+            logger.error(
+                "Gemini API error: status=%s body=%s",
+                response.status_code, response.text[:_LOG_BODY_LIMIT]
+            )
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=f"Gemini API error: {response.text}"
+            )
+        
+        data = orjson.loads(response.content)
+        
+        # Safely extract text from response
+        try:
+            text = data["candidates"][0]["content"]["parts"][0]["text"]
+        except (KeyError, IndexError) as e:
+            logger.error("Unexpected Gemini response structure: %r", e)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Gemini response:\n%s", orjson.dumps(data, option=orjson.OPT_INDENT_2).decode())
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=f"Unexpected Gemini response structure: {str(e)}"
+            )
+        
+        if json_response:
+            # responseMimeType normally yields bare JSON, so try it as-is first
             try:
-                text = data["candidates"][0]["content"]["parts"][0]["text"]
-            except (KeyError, IndexError) as e:
-                print(f"--- GEMINI RESPONSE STRUCTURE ERROR ---\nData: {json.dumps(data, indent=2)}\n--- END ERROR ---")
-                raise HTTPException(
-                    status_code=status.HTTP_502_BAD_GATEWAY,
-                    detail=f"Unexpected Gemini response structure: {str(e)}"
-                )
+                result = orjson.loads(text)
+            except orjson.JSONDecodeError:
+                result = None
             
-            if json_response:
-                text = text.strip()
-                # Try to find JSON block
+            if not isinstance(result, dict):
+                # Fall back to the JSON object embedded in the text
                 start_idx = text.find('{')
                 end_idx = text.rfind('}')
                 
                 if start_idx != -1 and end_idx != -1:
-                    text = text[start_idx:end_idx+1]
-                
-                return json.loads(text)
-            
-            return {"text": text}
+                    result = orjson.loads(text[start_idx:end_idx+1])
+                else:
+                    result = orjson.loads(text)
             
-    except json.JSONDecodeError as e:
-        print(f"--- RAW AI RESPONSE ---\n{text}\n--- END RAW AI RESPONSE ---")
+            # Endpoints read fields off the result, so any other JSON value is unusable
+            if not isinstance(result, dict):
+                logger.error("AI response is not a JSON object:\n%s", text[:_LOG_BODY_LIMIT])
+                raise HTTPException(
+                    status_code=status.HTTP_502_BAD_GATEWAY,
+                    detail="Invalid AI response: expected a JSON object"
+                )
+        else:
+            result = {"text": text}
+        
+        # Answers are sampled, so a malformed one must not be pinned for later retries
+        if all(key in result for key in _EXPECTED_KEYS.get(prompt_key, ())):
+            _response_cache[cache_key] = result
+        return result
+        
+    except orjson.JSONDecodeError as e:
+        # text is still None when the Gemini envelope itself was not valid JSON
+        body = text if text is not None else response.content.decode(errors="replace")
+        logger.error("Failed to parse AI response: %s\n%s", e, body[:_LOG_BODY_LIMIT])
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to parse AI response: {str(e)}"
@@ -171,168 +279,135 @@ async def call_gemini_api(prompt: str, json_response: bool = True) -> dict:
     except HTTPException:
         raise  # Re-raise HTTPException as-is
     except Exception as e:
-        print(f"--- UNEXPECTED ERROR ---\nType: {type(e).__name__}\nMessage: {str(e)}\n--- END ERROR ---")
+        logger.exception("AI analysis failed")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"AI analysis failed: {str(e)}"
         )
 
 
-@router.post("/ai/seo-audit", response_model=SEOAuditResponse)
+@router.post("/ai/seo-audit", responses={200: {"model": SEOAuditResponse}})
 async def ai_seo_audit(
     request: SEOAuditRequest,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    client: httpx.AsyncClient = Depends(get_http)
 ):
     """
     Generate AI-powered SEO recommendations.
     """
     seo_data = request.seo_data
+    meta = seo_data.get('meta', {})
+    links = seo_data.get('links', {})
     
-    prompt = f"""You are an expert SEO consultant. Analyze the following SEO data for the website {request.url} and provide actionable recommendations.
+    prompt = f"""Analyze the following SEO data for the website {request.url} and provide actionable recommendations.
 
 SEO Data:
-- Title: {seo_data.get('meta', {}).get('title', 'Missing')}
-- Description: {seo_data.get('meta', {}).get('description', 'Missing')}
+- Title: {meta.get('title', 'Missing')}
+- Description: {meta.get('description', 'Missing')}
 - H1 Tags: {seo_data.get('headings', {}).get('h1', [])}
 - Images without alt: {seo_data.get('images', {}).get('withoutAlt', 0)}
 - Word count: {seo_data.get('wordCount', 0)}
-- Internal links: {seo_data.get('links', {}).get('internal', 0)}
-- External links: {seo_data.get('links', {}).get('external', 0)}
-- Keywords: {json.dumps(seo_data.get('keywords', [])[:5])}
-- Current Score: {seo_data.get('score', 0)}/100
-
-Provide your response as JSON with this exact structure:
-{{
-    "checklist": ["list of 5-8 key SEO items to check"],
-    "issues": [
-        {{
-            "issue_description": "Description of the issue",
-            "category": "Technical SEO|Content|On-Page|Links",
-            "impact": "High|Medium|Low",
-            "page_or_section": "Where this applies",
-            "recommendation": "How to fix it",
-            "error_or_notes": "Additional context if any"
-        }}
-    ]
-}}
-
-Focus on the most impactful issues first. Limit to 5-10 issues."""
-
-    result = await call_gemini_api(prompt)
-    
-    return SEOAuditResponse(
-        checklist=result.get("checklist", []),
-        issues=result.get("issues", [])
+- Internal links: {links.get('internal', 0)}
+- External links: {links.get('external', 0)}
+- Keywords: {orjson.dumps(seo_data.get('keywords', [])[:5]).decode()}
+- Current Score: {seo_data.get('score', 0)}/100"""
+
+    result = await call_gemini_api(
+        client,
+        prompt,
+        prompt_key="seo_audit"
     )
+    
+    return ORJSONResponse(content={
+        "checklist": result.get("checklist", []),
+        "issues": result.get("issues", [])
+    })
 
 
-@router.post("/ai/performance-guide", response_model=PerformanceGuideResponse)
+@router.post("/ai/performance-guide", responses={200: {"model": PerformanceGuideResponse}})
 async def ai_performance_guide(
     request: PerformanceGuideRequest,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    client: httpx.AsyncClient = Depends(get_http)
 ):
     """
     Generate AI-powered performance optimization guide.
     """
     psi_data = request.psi_data
+    vitals = psi_data.get('coreWebVitals', {})
     
-    prompt = f"""You are a web performance expert. Analyze the following PageSpeed Insights data and provide a comprehensive optimization guide.
+    prompt = f"""Analyze the following PageSpeed Insights data and provide a comprehensive optimization guide.
 
 Performance Score: {psi_data.get('performanceScore', 0)}/100
 
 Core Web Vitals:
-- LCP: {psi_data.get('coreWebVitals', {}).get('lcp', {}).get('value', 'N/A')}
-- FCP: {psi_data.get('coreWebVitals', {}).get('fcp', {}).get('value', 'N/A')}
-- CLS: {psi_data.get('coreWebVitals', {}).get('cls', {}).get('value', 'N/A')}
+- LCP: {vitals.get('lcp', {}).get('value', 'N/A')}
+- FCP: {vitals.get('fcp', {}).get('value', 'N/A')}
+- CLS: {vitals.get('cls', {}).get('value', 'N/A')}
 
-Failed Audits: {json.dumps(psi_data.get('failedAudits', [])[:10])}
+Failed Audits: {orjson.dumps(psi_data.get('failedAudits', [])[:10]).decode()}"""
 
-Provide your response as JSON with this exact structure:
-{{
-    "summary": "Brief overview of the performance state (2-3 sentences)",
-    "fixes": [
-        {{
-            "title": "Fix title",
-            "severity": "High|Medium|Low",
-            "technical_explanation": "Detailed technical explanation",
-            "code_suggestion": "Example code if applicable",
-            "impact_on_seo": "How this affects SEO rankings"
-        }}
-    ]
-}}
-
-Prioritize fixes by impact. Include 5-8 actionable fixes."""
-
-    result = await call_gemini_api(prompt)
-    
-    return PerformanceGuideResponse(
-        summary=result.get("summary", ""),
-        fixes=result.get("fixes", [])
+    result = await call_gemini_api(
+        client,
+        prompt,
+        prompt_key="performance_guide"
     )
+    
+    return ORJSONResponse(content={
+        "summary": result.get("summary", ""),
+        "fixes": result.get("fixes", [])
+    })
 
 
-@router.post("/ai/specific-fix", response_model=SpecificFixResponse)
+@router.post("/ai/specific-fix", responses={200: {"model": SpecificFixResponse}})
 async def ai_specific_fix(
     request: SpecificFixRequest,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    client: httpx.AsyncClient = Depends(get_http)
 ):
     """
     Generate a specific fix for an identified issue.
     """
-    prompt = f"""You are a web development expert. Provide a detailed fix for the following issue:
+    prompt = f"""Provide a detailed fix for the following issue:
 
 Issue Type: {request.issue_type}
-Context: {json.dumps(request.context)}
-
-Provide your response as JSON with this exact structure:
-{{
-    "explanation": "Detailed explanation of the issue and why it matters",
-    "code_example": "Code example showing the fix (if applicable)",
-    "steps": ["Step 1", "Step 2", "Step 3"]
-}}
+Context: {orjson.dumps(request.context).decode()}"""
 
-Be specific and actionable."""
-
-    result = await call_gemini_api(prompt)
-    
-    return SpecificFixResponse(
-        explanation=result.get("explanation", ""),
-        code_example=result.get("code_example"),
-        steps=result.get("steps", [])
+    result = await call_gemini_api(
+        client,
+        prompt,
+        prompt_key="specific_fix"
     )
+    
+    return ORJSONResponse(content={
+        "explanation": result.get("explanation", ""),
+        "code_example": result.get("code_example"),
+        "steps": result.get("steps", [])
+    })
 
 
-@router.post("/ai/generate-seo-files", response_model=SEOFilesResponse)
+@router.post("/ai/generate-seo-files", responses={200: {"model": SEOFilesResponse}})
 async def ai_generate_seo_files(
     request: SEOFilesRequest,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    client: httpx.AsyncClient = Depends(get_http)
 ):
     """
     Generate SEO files for a website.
     """
-    prompt = f"""You are an SEO expert. Generate the following files for the website: {request.url}
+    prompt = f"""Generate the SEO files for the website: {request.url}
 
 Site Data:
-{json.dumps(request.site_data)}
-
-Generate these files:
-1. robots.txt - Standard robots.txt with appropriate rules
-2. sitemap.xml - Valid XML sitemap with the provided URLs
-3. llms.txt - A file describing the site for LLM crawlers
+{orjson.dumps(request.site_data).decode()}"""
 
-Provide your response as JSON with this exact structure:
-{{
-    "robots_txt": "Complete robots.txt content",
-    "sitemap_xml": "Complete valid XML sitemap",
-    "llms_txt": "Complete llms.txt content"
-}}
-
-Make sure all files are properly formatted and valid."""
-
-    result = await call_gemini_api(prompt)
-    
-    return SEOFilesResponse(
-        robots_txt=result.get("robots_txt", ""),
-        sitemap_xml=result.get("sitemap_xml", ""),
-        llms_txt=result.get("llms_txt", "")
+    result = await call_gemini_api(
+        client,
+        prompt,
+        prompt_key="seo_files"
     )
+    
+    return ORJSONResponse(content={
+        "robots_txt": result.get("robots_txt", ""),
+        "sitemap_xml": result.get("sitemap_xml", ""),
+        "llms_txt": result.get("llms_txt", "")
+    })
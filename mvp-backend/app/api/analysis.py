@@ -4,54 +4,35 @@ Server-side URL fetching, SEO analysis, and PageSpeed Insights.
 """
 import httpx
 import asyncio
-from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import HTTPAuthorizationCredentials
+import hashlib
+import orjson
+from cachetools import LRUCache, TTLCache
+from typing import AsyncIterator, Dict, Iterable, Optional, Tuple
+from urllib.parse import urljoin, urldefrag
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from pydantic import BaseModel, HttpUrl
-from sqlmodel import Session, select
+from selectolax.lexbor import LexborHTMLParser
 
 from app.models import User
-from app.database import get_session
 from app.core.config import settings
-from app.core.security import decode_token, security
-from app.services.seo_analyzer import analyze_html, extract_seo_data
-from app.services.url_fetcher import fetch_url_content
-
-router = APIRouter()
-
-
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    session: Session = Depends(get_session)
-) -> User:
-    """Get the current authenticated user."""
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
-    # Handle missing credentials
-    if credentials is None:
-        raise credentials_exception
-    
-    token = credentials.credentials
-    payload = decode_token(token)
-    
-    if payload is None:
-        raise credentials_exception
-    
-    email: str = payload.get("sub")
-    if email is None:
-        raise credentials_exception
-    
-    statement = select(User).where(User.email == email)
-    user = session.exec(statement).first()
-    
-    if user is None:
-        raise credentials_exception
-    
-    return user
+from app.services.seo_analyzer import _ASSET_EXTS, analyze_html, extract_seo_data, parse_html
+from app.services.url_fetcher import decode_content, fetch_url_content, parse_url
+from app.api.deps import get_current_user, get_http
+
+router = APIRouter(default_response_class=ORJSONResponse)
+
+# Rendered PageSpeed responses keyed by (url, strategy, include_screenshot); a Lighthouse run takes 20-60s
+_psi_cache: TTLCache = TTLCache(maxsize=512, ttl=settings.PSI_CACHE_TTL)
+
+# Landing-page analyses keyed by (url, charset, content digest); an unchanged page analyzes identically
+_analysis_cache: LRUCache = LRUCache(maxsize=256)
+
+# Concurrent page fetches during a deep scan
+_CRAWL_WORKERS = 10
+
+# Linked pages fetched speculatively while a deep scan's landing page is analyzed
+_PREFETCH_BATCH = 10
 
 
 class FetchUrlRequest(BaseModel):
@@ -85,15 +66,16 @@ class SEOAnalyzeRequest(BaseModel):
 @router.post("/fetch-url", response_model=FetchUrlResponse)
 async def fetch_url(
     request: FetchUrlRequest,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    client: httpx.AsyncClient = Depends(get_http)
 ):
     """
     Fetch URL content server-side.
     """
     try:
-        result = await fetch_url_content(str(request.url))
+        result = await fetch_url_content(str(request.url), client=client)
         return FetchUrlResponse(
-            content=result["content"],
+            content=decode_content(result["content_bytes"], result["encoding"]),
             final_url=result["final_url"],
             status_code=result["status_code"]
         )
@@ -104,134 +86,298 @@ async def fetch_url(
         )
 
 
+def _internal_links(doc: LexborHTMLParser, page_url: str) -> Dict[str, None]:
+    """Collect crawlable same-site links of a parsed page, in document order."""
+    parsed_base = parse_url(page_url)
+    base_domain = parsed_base.netloc
+    
+    discovered_urls = {}
+    for link in doc.css("a[href]"):
+        href = link.attributes.get("href") or ""
+        if not href or href.startswith("#") or href.startswith("javascript:"):
+            continue
+        try:
+            full_url = urljoin(page_url, href)
+            parsed = parse_url(full_url)
+            if parsed.netloc == base_domain:
+                # Skip asset links
+                if parsed.path.rsplit(".", 1)[-1].lower() not in _ASSET_EXTS:
+                    # Normalize URL (remove fragment)
+                    clean_url = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
+                    if parsed.query:
+                        clean_url += f"?{parsed.query}"
+                    discovered_urls[clean_url] = None
+        except Exception:
+            pass
+    return discovered_urls
+
+
+async def _limited_fetch(
+    client: httpx.AsyncClient,
+    fetch_limiter: asyncio.Semaphore,
+    page_url: str
+) -> dict:
+    """Fetch a page once a slot of the crawl's fetch limiter is free."""
+    async with fetch_limiter:
+        return await fetch_url_content(page_url, client=client)
+
+
+def _prefetch_pages(
+    client: httpx.AsyncClient,
+    fetch_limiter: asyncio.Semaphore,
+    doc: LexborHTMLParser,
+    page_url: str,
+    batch_size: int
+) -> Dict[str, asyncio.Task]:
+    """Start fetching the first internal links of a page while it is still being analyzed."""
+    prefetched = {}
+    for link_url in _internal_links(doc, page_url):
+        if len(prefetched) >= batch_size:
+            break
+        if link_url != page_url:
+            prefetched[link_url] = asyncio.create_task(
+                _limited_fetch(client, fetch_limiter, link_url)
+            )
+    return prefetched
+
+
+def _inspect_page(
+    html: bytes,
+    encoding: Optional[str],
+    page_url: str
+) -> Tuple[dict, Dict[str, None]]:
+    """Parse a crawled page; returns its SEO data and the internal links found on it."""
+    doc = parse_html(html, encoding)
+    return extract_seo_data(doc, page_url), _internal_links(doc, page_url)
+
+
+async def _analyze_page(
+    client: httpx.AsyncClient,
+    fetch_limiter: asyncio.Semaphore,
+    page_url: str,
+    prefetch: Optional[asyncio.Task] = None
+) -> Tuple[dict, Iterable[str]]:
+    """Analyze a single page; returns (page_data, discovered internal URLs)."""
+    try:
+        if prefetch is not None:
+            page_result = await prefetch
+        else:
+            page_result = await _limited_fetch(client, fetch_limiter, page_url)
+        # Parsing is CPU-bound; off the event loop, pages are parsed in parallel
+        page_seo, discovered_urls = await asyncio.to_thread(
+            _inspect_page, page_result["content_bytes"], page_result["encoding"], page_url
+        )
+        
+        page_data = {
+            "url": page_url,
+            "status": "200",
+            "score": page_seo["score"],
+            "issues": page_seo["issue_count"],
+            "title": page_seo["title"] or "Untitled Page",
+            "issueDetails": page_seo["issue_details"]
+        }
+        return page_data, discovered_urls
+    except Exception:
+        page_data = {
+            "url": page_url,
+            "status": "error",
+            "score": 0,
+            "issues": 1,
+            "title": "Failed to load"
+        }
+        return page_data, ()
+
+
+async def _crawl_site(
+    client: httpx.AsyncClient,
+    fetch_limiter: asyncio.Semaphore,
+    seo_data: dict,
+    final_url: str,
+    max_pages: int,
+    prefetched: Dict[str, asyncio.Task]
+) -> AsyncIterator[dict]:
+    """
+    Crawl the site starting from an already analyzed landing page.
+    
+    Yields one crawled-page entry per page as soon as it is analyzed,
+    starting with the landing page itself. Fetches already started for
+    some of its links are taken from ``prefetched``.
+    """
+    # Every URL queued or crawled, so each page is fetched at most once
+    seen_urls = {final_url}  # Already crawled the main page
+    
+    # URLs waiting to be crawled; workers feed discovered URLs back in
+    queue: asyncio.Queue = asyncio.Queue()
+    
+    # Seed with the main page's internal URLs in document order (fragments
+    # address the same page), only as many as max_pages leaves room for
+    for page_url in seo_data.get("links", {}).get("internalUrls", []):
+        if len(seen_urls) >= max_pages:
+            break
+        page_url = urldefrag(page_url).url
+        if page_url not in seen_urls:
+            seen_urls.add(page_url)
+            queue.put_nowait(page_url)
+    
+    # Analyzed pages handed from the workers to the consumer
+    results: asyncio.Queue = asyncio.Queue()
+    
+    yield {
+        "url": final_url,
+        "status": "200",
+        "score": seo_data.get("score", 0),
+        "issues": len(seo_data.get("issues", [])),
+        "title": seo_data.get("meta", {}).get("title") or "Main Page",
+        "issueDetails": seo_data.get("issues", [])
+    }
+    
+    async def crawl_worker():
+        """Crawl queued pages until cancelled."""
+        while True:
+            page_url = await queue.get()
+            page_data, discovered_urls = await _analyze_page(
+                client, fetch_limiter, page_url, prefetched.pop(page_url, None)
+            )
+            
+            # Add newly discovered URLs to the queue. Each seen URL yields
+            # exactly one crawled page, so stop once max_pages are covered.
+            for new_url in discovered_urls:
+                if len(seen_urls) >= max_pages:
+                    break
+                if new_url not in seen_urls:
+                    seen_urls.add(new_url)
+                    queue.put_nowait(new_url)
+            
+            results.put_nowait(page_data)
+    
+    workers = [asyncio.create_task(crawl_worker()) for _ in range(_CRAWL_WORKERS)]
+    try:
+        # Workers register discovered URLs before reporting their own page, so
+        # once every seen URL has a result the crawl is complete.
+        crawled_count = 1
+        while crawled_count < min(len(seen_urls), max_pages):
+            yield await results.get()
+            crawled_count += 1
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+
+async def _analyze_landing_page(fetch_result: dict, doc: Optional[LexborHTMLParser] = None) -> dict:
+    """
+    Analyze a fetched page, reusing the analysis of identical content at the same URL.
+    
+    Pass ``doc`` if the page has already been parsed; it is only analyzed on a cache miss.
+    """
+    content = fetch_result["content_bytes"]
+    final_url = fetch_result["final_url"]
+    cache_key = (
+        final_url,
+        fetch_result["encoding"],
+        hashlib.blake2b(content, digest_size=16).digest()
+    )
+    
+    seo_data = _analysis_cache.get(cache_key)
+    if seo_data is None:
+        if doc is None:
+            doc = await asyncio.to_thread(parse_html, content, fetch_result["encoding"])
+        seo_data = await asyncio.to_thread(analyze_html, doc, final_url)
+        _analysis_cache[cache_key] = seo_data
+    
+    # Shallow copy: deep scans set crawledPages on the result
+    return dict(seo_data)
+
+
+async def _deep_scan(
+    client: httpx.AsyncClient,
+    fetch_result: dict,
+    doc: LexborHTMLParser,
+    max_pages: int
+) -> AsyncIterator[dict]:
+    """
+    Analyze a fetched landing page and crawl the site from it.
+    
+    Yields the landing-page analysis, then one crawled-page entry per page.
+    Nothing is fetched before the first item is requested, and closing the
+    generator cancels every fetch still in flight.
+    """
+    final_url = fetch_result["final_url"]
+    fetch_limiter = asyncio.Semaphore(_CRAWL_WORKERS)
+    
+    # Start fetching the first linked pages while the landing page is analyzed
+    prefetched = _prefetch_pages(
+        client, fetch_limiter, doc, final_url, min(_PREFETCH_BATCH, max_pages - 1)
+    )
+    crawl = None
+    try:
+        seo_data = await _analyze_landing_page(fetch_result, doc)
+        yield seo_data
+        
+        crawl = _crawl_site(client, fetch_limiter, seo_data, final_url, max_pages, prefetched)
+        async for page_data in crawl:
+            yield page_data
+    finally:
+        if crawl is not None:
+            await crawl.aclose()
+        # Prefetches of links that were never queued are dropped as well
+        for task in prefetched.values():
+            task.cancel()
+        await asyncio.gather(*prefetched.values(), return_exceptions=True)
+
+
+async def _stream_deep_scan(scan: AsyncIterator[dict]) -> AsyncIterator[bytes]:
+    """Emit the landing-page analysis, one NDJSON line per crawled page, then a summary."""
+    try:
+        yield orjson.dumps({"type": "analysis", "data": await anext(scan)}) + b"\n"
+        
+        crawled_count = 0
+        async for page_data in scan:
+            crawled_count += 1
+            yield orjson.dumps({"type": "page", "data": page_data}) + b"\n"
+        
+        yield orjson.dumps({"type": "summary", "crawledCount": crawled_count}) + b"\n"
+    finally:
+        await scan.aclose()
+
+
 @router.post("/seo/analyze")
 async def seo_analyze(
     request: SEOAnalyzeRequest,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    client: httpx.AsyncClient = Depends(get_http),
+    accept: str = Header("")
 ):
     """
     Perform SEO analysis on the given URL.
     When deep_scan is True, crawls all discoverable pages on the site.
+    Deep scans requested with ``Accept: application/x-ndjson`` are streamed
+    page by page instead of returned as a single document.
     """
     try:
-        fetch_result = await fetch_url_content(str(request.url))
-        html_content = fetch_result["content"]
-        final_url = fetch_result["final_url"]
+        fetch_result = await fetch_url_content(str(request.url), client=client)
         
-        seo_data = analyze_html(html_content, final_url)
+        if not request.deep_scan:
+            seo_data = await _analyze_landing_page(fetch_result)
+            return ORJSONResponse(content=seo_data)
         
-        if request.deep_scan:
-            # Get initial internal URLs from the main page
-            initial_urls = set(seo_data.get("links", {}).get("internalUrls", []))
-            
-            # Track all discovered and crawled URLs
-            crawled_urls = {final_url}  # Already crawled the main page
-            pages_to_crawl = list(initial_urls - crawled_urls)
-            crawled_pages = []
-            
-            # Add main page to crawled pages list
-            main_page = {
-                "url": final_url,
-                "status": "200",
-                "score": seo_data.get("score", 0),
-                "issues": len(seo_data.get("issues", [])),
-                "title": seo_data.get("meta", {}).get("title") or "Main Page",
-                "issueDetails": seo_data.get("issues", [])
-            }
-            crawled_pages.append(main_page)
-            
-            async def analyze_page(page_url: str):
-                """Analyze a single page and return discovered internal URLs."""
-                try:
-                    page_result = await fetch_url_content(page_url)
-                    page_html = page_result["content"]
-                    page_seo = extract_seo_data(page_html, page_url)
-                    
-                    # Also extract links from this page to discover more URLs
-                    from bs4 import BeautifulSoup
-                    from urllib.parse import urljoin, urlparse
-                    
-                    soup = BeautifulSoup(page_html, "lxml")
-                    links = soup.find_all("a", href=True)
-                    parsed_base = urlparse(page_url)
-                    base_domain = parsed_base.netloc
-                    
-                    discovered_urls = set()
-                    for link in links:
-                        href = link.get("href", "")
-                        if not href or href.startswith("#") or href.startswith("javascript:"):
-                            continue
-                        try:
-                            full_url = urljoin(page_url, href)
-                            parsed = urlparse(full_url)
-                            if parsed.netloc == base_domain:
-                                # Skip asset links
-                                import re
-                                if not re.search(r"\.(jpg|jpeg|png|gif|css|js|pdf|svg|ico|xml|woff|woff2|ttf|eot)$", parsed.path, re.I):
-                                    # Normalize URL (remove fragment)
-                                    clean_url = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
-                                    if parsed.query:
-                                        clean_url += f"?{parsed.query}"
-                                    discovered_urls.add(clean_url)
-                        except Exception:
-                            pass
-                    
-                    return {
-                        "page_data": {
-                            "url": page_url,
-                            "status": "200",
-                            "score": page_seo.get("score", 0),
-                            "issues": page_seo.get("issue_count", 0),
-                            "title": page_seo.get("title") or "Untitled Page",
-                            "issueDetails": page_seo.get("issue_details", [])
-                        },
-                        "discovered_urls": discovered_urls
-                    }
-                except Exception as e:
-                    return {
-                        "page_data": {
-                            "url": page_url,
-                            "status": "error",
-                            "score": 0,
-                            "issues": 1,
-                            "title": "Failed to load"
-                        },
-                        "discovered_urls": set()
-                    }
-            
-            # Crawl pages in batches until we reach max_pages or run out of URLs
-            max_pages = request.max_pages
-            batch_size = 10  # Concurrent requests per batch
-            
-            while pages_to_crawl and len(crawled_pages) < max_pages:
-                # Get batch of pages to crawl
-                batch = pages_to_crawl[:batch_size]
-                pages_to_crawl = pages_to_crawl[batch_size:]
-                
-                # Crawl batch concurrently
-                tasks = [analyze_page(url) for url in batch if url not in crawled_urls]
-                results = await asyncio.gather(*tasks, return_exceptions=True)
-                
-                for result in results:
-                    if isinstance(result, Exception) or result is None:
-                        continue
-                    
-                    # Add to crawled pages
-                    crawled_pages.append(result["page_data"])
-                    crawled_urls.add(result["page_data"]["url"])
-                    
-                    # Add newly discovered URLs to the queue
-                    for new_url in result["discovered_urls"]:
-                        if new_url not in crawled_urls and new_url not in pages_to_crawl:
-                            pages_to_crawl.append(new_url)
-                    
-                    # Stop if we've reached max pages
-                    if len(crawled_pages) >= max_pages:
-                        break
-            
-            seo_data["crawledPages"] = crawled_pages
+        # Parsed once; the deep scan reads its links before the analysis strips the tree
+        doc = await asyncio.to_thread(
+            parse_html, fetch_result["content_bytes"], fetch_result["encoding"]
+        )
+        scan = _deep_scan(client, fetch_result, doc, request.max_pages)
         
-        return seo_data
+        if "application/x-ndjson" in accept:
+            # Left uncompressed by the GZip middleware so each page is sent as it is analyzed
+            return StreamingResponse(_stream_deep_scan(scan), media_type="application/x-ndjson")
+        
+        try:
+            seo_data = await anext(scan)
+            seo_data["crawledPages"] = [page_data async for page_data in scan]
+        finally:
+            await scan.aclose()
+        
+        return ORJSONResponse(content=seo_data)
         
     except Exception as e:
         raise HTTPException(
@@ -240,13 +386,16 @@ async def seo_analyze(
         )
 
 
-@router.post("/psi/run", response_model=PSIResponse)
+@router.post("/psi/run", responses={200: {"model": PSIResponse}})
 async def run_pagespeed(
     request: PSIRequest,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    client: httpx.AsyncClient = Depends(get_http),
+    include_screenshot: bool = Query(False)
 ):
     """
     Run PageSpeed Insights analysis.
+    The base64 screenshot is only included when include_screenshot is set.
     """
     psi_key = settings.PSI_API_KEY
     
@@ -256,71 +405,77 @@ async def run_pagespeed(
             detail="PageSpeed Insights API key not configured"
         )
     
+    cache_key = (str(request.url), request.strategy, include_screenshot)
+    cached = _psi_cache.get(cache_key)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+    
     try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            psi_url = "https://www.googleapis.com/pagespeedonline/v5/runPagespeed"
-            params = {
-                "url": str(request.url),
-                "key": psi_key,
-                "strategy": request.strategy,
-                "category": ["performance", "accessibility", "best-practices", "seo"]
-            }
-            
-            response = await client.get(psi_url, params=params)
-            
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=status.HTTP_502_BAD_GATEWAY,
-                    detail=f"PageSpeed API error: {response.text}"
-                )
-            
-            data = response.json()
-            lighthouse = data.get("lighthouseResult", {})
-            categories = lighthouse.get("categories", {})
-            audits = lighthouse.get("audits", {})
-            
-            def get_metric(audit_id: str):
-                audit = audits.get(audit_id, {})
-                return {
-                    "value": audit.get("displayValue", "N/A"),
-                    "score": "good" if (audit.get("score") or 0) >= 0.9 else 
-                            "needs-improvement" if (audit.get("score") or 0) >= 0.5 else "poor"
-                }
-            
-            core_web_vitals = {
-                "lcp": get_metric("largest-contentful-paint"),
-                "fcp": get_metric("first-contentful-paint"),
-                "cls": get_metric("cumulative-layout-shift"),
-                "inp": get_metric("interaction-to-next-paint") if "interaction-to-next-paint" in audits else get_metric("total-blocking-time")
-            }
-            
-            performance_score = int((categories.get("performance", {}).get("score") or 0) * 100)
-            
-            failed_audits = []
-            for audit_id, audit in audits.items():
-                score = audit.get("score")
-                if score is not None and score < 1 and audit.get("details"):
-                    failed_audits.append({
-                        "id": audit_id,
-                        "title": audit.get("title", ""),
-                        "description": audit.get("description", ""),
-                        "score": score,
-                        "displayValue": audit.get("displayValue", "")
-                    })
-            
-            failed_audits.sort(key=lambda x: x.get("score", 1))
-            
-            screenshot = None
-            if "final-screenshot" in audits:
-                screenshot = audits["final-screenshot"].get("details", {}).get("data")
-            
-            return PSIResponse(
-                performance_score=performance_score,
-                core_web_vitals=core_web_vitals,
-                failed_audits=failed_audits[:20],
-                screenshot=screenshot
+        psi_url = "https://www.googleapis.com/pagespeedonline/v5/runPagespeed"
+        params = {
+            "url": str(request.url),
+            "key": psi_key,
+            "strategy": request.strategy,
+            "category": ["performance", "accessibility", "best-practices", "seo"]
+        }
+        
+        response = await client.get(psi_url, params=params)
+        
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=f"PageSpeed API error: {response.text}"
             )
-            
+        
+        data = orjson.loads(response.content)
+        lighthouse = data.get("lighthouseResult", {})
+        categories = lighthouse.get("categories", {})
+        audits = lighthouse.get("audits", {})
+        
+        def get_metric(audit_id: str):
+            audit = audits.get(audit_id, {})
+            return {
+                "value": audit.get("displayValue", "N/A"),
+                "score": "good" if (audit.get("score") or 0) >= 0.9 else 
+                        "needs-improvement" if (audit.get("score") or 0) >= 0.5 else "poor"
+            }
+        
+        core_web_vitals = {
+            "lcp": get_metric("largest-contentful-paint"),
+            "fcp": get_metric("first-contentful-paint"),
+            "cls": get_metric("cumulative-layout-shift"),
+            "inp": get_metric("interaction-to-next-paint") if "interaction-to-next-paint" in audits else get_metric("total-blocking-time")
+        }
+        
+        performance_score = int((categories.get("performance", {}).get("score") or 0) * 100)
+        
+        failed_audits = []
+        for audit_id, audit in audits.items():
+            score = audit.get("score")
+            if score is not None and score < 1 and audit.get("details"):
+                failed_audits.append({
+                    "id": audit_id,
+                    "title": audit.get("title", ""),
+                    "description": audit.get("description", ""),
+                    "score": score,
+                    "displayValue": audit.get("displayValue", "")
+                })
+        
+        failed_audits.sort(key=lambda x: x.get("score", 1))
+        
+        screenshot = None
+        if include_screenshot and "final-screenshot" in audits:
+            screenshot = audits["final-screenshot"].get("details", {}).get("data")
+        
+        psi_response = ORJSONResponse(content={
+            "performance_score": performance_score,
+            "core_web_vitals": core_web_vitals,
+            "failed_audits": failed_audits[:20],
+            "screenshot": screenshot
+        })
+        _psi_cache[cache_key] = psi_response.body
+        return psi_response
+        
     except httpx.TimeoutException:
         raise HTTPException(
             status_code=status.HTTP_504_GATEWAY_TIMEOUT,
@@ -2,79 +2,32 @@
 Authentication API endpoints.
 Handles user registration, login, and token validation.
 """
+import asyncio
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.database import get_session
 from app.models import User
 from app.schemas import UserCreate, UserRead, Token, LoginRequest
 from app.core.config import settings
 from app.core.security import (
     hash_password,
     verify_password,
-    create_access_token,
-    decode_token,
-    security
+    create_access_token
 )
-from fastapi.security import HTTPAuthorizationCredentials
+from app.api.deps import get_current_user, get_session, invalidate_user_cache
 
-router = APIRouter()
-
-
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    session: Session = Depends(get_session)
-) -> User:
-    """Get the current authenticated user from the JWT token."""
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
-    # Handle missing credentials
-    if credentials is None:
-        raise credentials_exception
-    
-    token = credentials.credentials
-    payload = decode_token(token)
-    
-    if payload is None:
-        raise credentials_exception
-    
-    email: str = payload.get("sub")
-    if email is None:
-        raise credentials_exception
-    
-    # Get user from database
-    statement = select(User).where(User.email == email)
-    user = session.exec(statement).first()
-    
-    if user is None:
-        raise credentials_exception
-    
-    if not user.is_active:
-        raise HTTPException(status_code=400, detail="Inactive user")
-    
-    return user
+router = APIRouter(default_response_class=ORJSONResponse)
 
 
 @router.post("/signup", response_model=UserRead, status_code=status.HTTP_201_CREATED)
-async def signup(user_data: UserCreate, session: Session = Depends(get_session)):
+async def signup(user_data: UserCreate, session: AsyncSession = Depends(get_session)):
     """
     Register a new user.
     """
-    # Check if user already exists
-    statement = select(User).where(User.email == user_data.email)
-    existing_user = session.exec(statement).first()
-    
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
-    
     # Validate password strength
     if len(user_data.password) < 6:
         raise HTTPException(
@@ -82,8 +35,8 @@ async def signup(user_data: UserCreate, session: Session = Depends(get_session))
             detail="Password must be at least 6 characters long"
         )
     
-    # Create new user
-    hashed_password = hash_password(user_data.password)
+    # Create new user (Argon2 is CPU-bound, so hash off the event loop)
+    hashed_password = await asyncio.to_thread(hash_password, user_data.password)
     user = User(
         email=user_data.email,
         full_name=user_data.full_name,
@@ -92,20 +45,27 @@ async def signup(user_data: UserCreate, session: Session = Depends(get_session))
     )
     
     session.add(user)
-    session.commit()
-    session.refresh(user)
+    try:
+        await session.commit()
+    except IntegrityError:
+        # Unique index on email rejects duplicates
+        await session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
     
     return user
 
 
 @router.post("/login", response_model=Token)
-async def login(login_data: LoginRequest, session: Session = Depends(get_session)):
+async def login(login_data: LoginRequest, session: AsyncSession = Depends(get_session)):
     """
     Authenticate user and return JWT token.
     """
-    # Find user by email
+    # Find user by email (served by the unique index on User.email)
     statement = select(User).where(User.email == login_data.email)
-    user = session.exec(statement).first()
+    user = (await session.exec(statement)).first()
     
     if not user:
         raise HTTPException(
@@ -113,8 +73,11 @@ async def login(login_data: LoginRequest, session: Session = Depends(get_session
             detail="Invalid email or password"
         )
     
-    # Verify password
-    if not verify_password(login_data.password, user.hashed_password):
+    # Verify password off the event loop
+    password_ok = await asyncio.to_thread(
+        verify_password, login_data.password, user.hashed_password
+    )
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
@@ -148,4 +111,5 @@ async def logout(current_user: User = Depends(get_current_user)):
     """
     Logout current user.
     """
+    invalidate_user_cache(current_user.email, current_user.id)
     return {"message": "Successfully logged out", "detail": "Please remove the token from client storage"}
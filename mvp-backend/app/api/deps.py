@@ -0,0 +1,90 @@
+"""
+Shared FastAPI dependencies for the API routers.
+"""
+from typing import Optional
+import httpx
+from cachetools import TTLCache
+from fastapi import HTTPException, Request
+from sqlmodel import select
+
+from app.database import async_session, get_session
+from app.models import User
+from app.core.security import CREDENTIALS_ERROR, INACTIVE_ERROR
+
+__all__ = [
+    "get_current_user",
+    "get_current_user_id",
+    "get_http",
+    "get_session",
+    "invalidate_user_cache",
+]
+
+# Recently authenticated users keyed by email, so repeated requests from the
+# same token skip the user lookup.
+_user_cache: TTLCache = TTLCache(maxsize=4096, ttl=60)
+
+# Ids of users recently confirmed active; owner-scoped routes trust the token's
+# user_id claim while it is listed here and re-check the account once it lapses.
+_active_user_ids: TTLCache = TTLCache(maxsize=4096, ttl=60)
+
+
+def get_http(request: Request) -> httpx.AsyncClient:
+    """Return the application-wide pooled HTTP client."""
+    return request.app.state.http
+
+
+async def _lookup_user(email: str) -> Optional[User]:
+    """Load a user in a short-lived session and cache the detached instance."""
+    user = _user_cache.get(email)
+    if user is not None:
+        return user
+    
+    async with async_session() as session:
+        result = await session.exec(select(User).where(User.email == email))
+        user = result.first()
+    
+    if user is not None:
+        _user_cache[email] = user
+    return user
+
+
+def invalidate_user_cache(email: str, user_id: Optional[int] = None) -> None:
+    """Drop a cached user so the next request reloads it from the database."""
+    _user_cache.pop(email, None)
+    if user_id is not None:
+        _active_user_ids.pop(user_id, None)
+
+
+async def get_current_user(request: Request) -> User:
+    """Get the current authenticated user from the JWT claims decoded by JWTAuthMiddleware."""
+    # Missing or invalid token
+    email: Optional[str] = getattr(request.state, "user_email", None)
+    if email is None:
+        raise HTTPException(**CREDENTIALS_ERROR)
+    
+    user = await _lookup_user(email)
+    
+    if user is None:
+        raise HTTPException(**CREDENTIALS_ERROR)
+    
+    if not user.is_active:
+        raise HTTPException(**INACTIVE_ERROR)
+    
+    return user
+
+
+async def get_current_user_id(request: Request) -> int:
+    """
+    Get the authenticated user's id for routes that only scope by owner.
+    
+    Read straight from the token's user_id claim while the account is known
+    to be active; otherwise (or for tokens without the claim) the user is
+    looked up once so deactivated accounts are still rejected.
+    """
+    user_id: Optional[int] = getattr(request.state, "user_id", None)
+    if user_id is not None and user_id in _active_user_ids:
+        return user_id
+    
+    user = await get_current_user(request)
+    _active_user_ids[user.id] = True
+    return user.id
@@ -2,110 +2,115 @@
 Reports API endpoints.
 Handles CRUD operations for SEO analysis reports.
 """
-from typing import List, Optional
+import base64
+from datetime import datetime
+from typing import List, Optional, Tuple
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from fastapi.security import HTTPAuthorizationCredentials
-from sqlmodel import Session, select, func
-
-from app.database import get_session
-from app.models import User, Report
-from app.schemas import ReportCreate, ReportRead, ReportUpdate, PaginatedReports
-from app.core.security import decode_token, security
-
-router = APIRouter()
-
-
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    session: Session = Depends(get_session)
-) -> User:
-    """Get the current authenticated user from the JWT token."""
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
-    # Handle missing credentials
-    if credentials is None:
-        raise credentials_exception
-    
-    token = credentials.credentials
-    payload = decode_token(token)
-    
-    if payload is None:
-        raise credentials_exception
-    
-    email: str = payload.get("sub")
-    if email is None:
-        raise credentials_exception
-    
-    statement = select(User).where(User.email == email)
-    user = session.exec(statement).first()
-    
-    if user is None:
-        raise credentials_exception
-    
-    if not user.is_active:
-        raise HTTPException(status_code=400, detail="Inactive user")
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import delete, lambda_stmt, tuple_, update
+from sqlalchemy.sql.lambdas import StatementLambdaElement
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models import Report
+from app.schemas import ReportCreate, ReportRead, ReportUpdate, ReportListItem, PaginatedReports
+from app.api.deps import get_current_user_id, get_session
+
+router = APIRouter(default_response_class=ORJSONResponse)
+
+
+def _encode_cursor(report: ReportListItem) -> str:
+    """Encode a report's (created_at, id) position as an opaque page cursor."""
+    raw = f"{report.created_at.isoformat()}|{report.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a page cursor back into (created_at, id)."""
+    try:
+        created_at, report_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(report_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def _list_statement(
+    owner_id: int,
+    fetch: int,
+    cursor_created_at: Optional[datetime] = None,
+    cursor_id: Optional[int] = None
+) -> StatementLambdaElement:
+    """
+    Build the report-list query as a lambda statement.
     
-    return user
+    The lambdas' closure values become bound parameters, so SQLAlchemy builds
+    and caches each variant (with or without a cursor) only once.
+    """
+    # The payload column is left out since lists never show it
+    statement = lambda_stmt(
+        lambda: select(Report.id, Report.title, Report.url, Report.created_at)
+        .where(Report.owner_id == owner_id)
+    )
+    if cursor_created_at is not None:
+        # Seek past the previous page instead of scanning over an OFFSET
+        statement += lambda s: s.where(
+            tuple_(Report.created_at, Report.id) < tuple_(cursor_created_at, cursor_id)
+        )
+    statement += lambda s: s.order_by(Report.created_at.desc(), Report.id.desc()).limit(fetch)
+    return statement
 
 
 @router.get("/reports", response_model=PaginatedReports)
 async def get_reports(
-    page: int = Query(1, ge=1, description="Page number"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor"),
     limit: int = Query(20, ge=1, le=100, description="Items per page"),
-    session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user)
+    session: AsyncSession = Depends(get_session),
+    owner_id: int = Depends(get_current_user_id)
 ):
     """
-    Get all reports for the current user with pagination.
+    Get all reports for the current user, newest first, with keyset pagination.
     """
-    offset = (page - 1) * limit
+    if cursor:
+        cursor_created_at, cursor_id = _decode_cursor(cursor)
+        statement = _list_statement(owner_id, limit + 1, cursor_created_at, cursor_id)
+    else:
+        statement = _list_statement(owner_id, limit + 1)
+    rows = (await session.exec(statement)).all()
+    reports = [ReportListItem(**row._asdict()) for row in rows]
     
-    # Get total count
-    count_statement = select(func.count(Report.id)).where(Report.owner_id == current_user.id)
-    total = session.exec(count_statement).one()
-    
-    # Get reports with pagination
-    statement = (
-        select(Report)
-        .where(Report.owner_id == current_user.id)
-        .order_by(Report.created_at.desc())
-        .offset(offset)
-        .limit(limit)
-    )
-    reports = session.exec(statement).all()
+    # The extra row only tells whether another page follows
+    has_more = len(reports) > limit
     
     return PaginatedReports(
-        items=reports,
-        total=total,
-        page=page,
+        items=reports[:limit],
         limit=limit,
-        pages=(total + limit - 1) // limit if total > 0 else 1
+        has_more=has_more,
+        next_cursor=_encode_cursor(reports[limit - 1]) if has_more else None
     )
 
 
 @router.post("/reports", response_model=ReportRead, status_code=status.HTTP_201_CREATED)
 async def create_report(
     report_data: ReportCreate,
-    session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user)
+    session: AsyncSession = Depends(get_session),
+    owner_id: int = Depends(get_current_user_id)
 ):
     """
     Create a new SEO analysis report.
     """
     report = Report(
         title=report_data.title,
-        url=report_data.url,
+        url=str(report_data.url),
         payload=report_data.payload,
-        owner_id=current_user.id
+        owner_id=owner_id
     )
     
     session.add(report)
-    session.commit()
-    session.refresh(report)
+    # expire_on_commit is off and the id comes back from the INSERT, so no refresh
+    await session.commit()
     
     return report
 
@@ -113,17 +118,14 @@ async def create_report(
 @router.get("/reports/{report_id}", response_model=ReportRead)
 async def get_report(
     report_id: int,
-    session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user)
+    session: AsyncSession = Depends(get_session),
+    owner_id: int = Depends(get_current_user_id)
 ):
     """Get a specific report by ID."""
-    statement = select(Report).where(
-        Report.id == report_id,
-        Report.owner_id == current_user.id
-    )
-    report = session.exec(statement).first()
+    # Primary-key lookup; other owners' reports are reported as missing too
+    report = await session.get(Report, report_id)
     
-    if not report:
+    if report is None or report.owner_id != owner_id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Report not found"
@@ -136,54 +138,51 @@ async def get_report(
 async def update_report(
     report_id: int,
     report_data: ReportUpdate,
-    session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user)
+    session: AsyncSession = Depends(get_session),
+    owner_id: int = Depends(get_current_user_id)
 ):
     """
     Update a report's title.
     """
-    statement = select(Report).where(
-        Report.id == report_id,
-        Report.owner_id == current_user.id
-    )
-    report = session.exec(statement).first()
+    if report_data.title is None:
+        # Nothing to change; return the report as it is
+        report = await session.get(Report, report_id)
+    else:
+        # Single UPDATE ... RETURNING, scoped to the owner
+        statement = (
+            update(Report)
+            .where(Report.id == report_id, Report.owner_id == owner_id)
+            .values(title=report_data.title)
+            .returning(Report)
+        )
+        report = (await session.exec(statement)).scalar_one_or_none()
+        await session.commit()
     
-    if not report:
+    if report is None or report.owner_id != owner_id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Report not found"
         )
     
-    if report_data.title is not None:
-        report.title = report_data.title
-    
-    session.add(report)
-    session.commit()
-    session.refresh(report)
-    
     return report
 
 
 @router.delete("/reports/{report_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_report(
     report_id: int,
-    session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user)
+    session: AsyncSession = Depends(get_session),
+    owner_id: int = Depends(get_current_user_id)
 ):
     """Delete a report."""
-    statement = select(Report).where(
-        Report.id == report_id,
-        Report.owner_id == current_user.id
-    )
-    report = session.exec(statement).first()
+    # Single owner-scoped DELETE; no matching row means missing or not ours
+    statement = delete(Report).where(Report.id == report_id, Report.owner_id == owner_id)
+    result = await session.exec(statement)
+    await session.commit()
     
-    if not report:
+    if result.rowcount == 0:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Report not found"
         )
     
-    session.delete(report)
-    session.commit()
-    
     return None
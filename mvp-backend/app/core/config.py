@@ -3,9 +3,10 @@ Application configuration using environment variables.
 All secrets are kept server-side.
 """
 import os
+from functools import cached_property, lru_cache
 from dotenv import load_dotenv
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Optional, Tuple
 
 load_dotenv()
 
@@ -25,9 +26,24 @@ class Settings(BaseSettings):
     GEMINI_API_KEY: Optional[str] = None
     PSI_API_KEY: Optional[str] = None
     
+    # Cache of AI responses for identical prompts (seconds / entries)
+    AI_RESPONSE_CACHE_TTL: int = 600
+    AI_RESPONSE_CACHE_SIZE: int = 1024
+    
+    # Cache of PageSpeed Insights results per (url, strategy) (seconds)
+    PSI_CACHE_TTL: int = 600
+    
+    # Level for the application's own loggers
+    LOG_LEVEL: str = "INFO"
+    
     # CORS
     ALLOWED_ORIGINS: str = "http://localhost:3000"
     
+    @cached_property
+    def ALLOWED_ORIGINS_LIST(self) -> Tuple[str, ...]:
+        """ALLOWED_ORIGINS split into individual origins (parsed once)."""
+        return tuple(origin.strip() for origin in self.ALLOWED_ORIGINS.split(",") if origin.strip())
+    
     # Rate Limiting
     RATE_LIMIT_REQUESTS: int = 100
     RATE_LIMIT_WINDOW: int = 3600
@@ -36,6 +52,13 @@ class Settings(BaseSettings):
         env_file = ".env"
         case_sensitive = True
         extra = "ignore"  # Ignore extra fields in .env
+        frozen = True  # Settings are read-only once loaded
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the process-wide settings, loading them on first use."""
+    return Settings()
 
 
-settings = Settings()
+settings = get_settings()
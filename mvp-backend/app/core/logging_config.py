@@ -0,0 +1,32 @@
+"""
+Application logging setup.
+Records are handed to a background thread so writing them never blocks the event loop.
+"""
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+from app.core.config import settings
+
+
+def setup_logging() -> QueueListener:
+    """
+    Route the ``app`` loggers through a queue drained by a listener thread.
+    
+    Returns the started listener; stop it on shutdown to flush pending records.
+    """
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(
+        logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+    )
+    listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    
+    app_logger = logging.getLogger("app")
+    app_logger.setLevel(settings.LOG_LEVEL)
+    app_logger.handlers = [QueueHandler(log_queue)]  # Replaces any handler from a previous startup
+    app_logger.propagate = False
+    
+    listener.start()
+    return listener
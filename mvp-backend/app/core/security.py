@@ -1,21 +1,38 @@
 """
 Security utilities for authentication and authorization.
 """
+import time
 from datetime import datetime, timedelta
+from threading import Lock
 from typing import Optional, Generator
+from cachetools import TTLCache
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlmodel import Session, select
+from fastapi import status
 
 from app.core.config import settings
 
-# Password hashing
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+# Password hashing - Argon2id at the OWASP minimum (19 MiB, 2 passes), roughly
+# 40ms per hash. Hashes made with other parameters still verify.
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    argon2__time_cost=2,
+    argon2__memory_cost=19456,
+    argon2__parallelism=1,
+    deprecated="auto"
+)
 
-# HTTP Bearer token scheme - auto_error=False to handle missing tokens gracefully
-security = HTTPBearer(auto_error=False)
+# Arguments of the shared auth errors; raise a fresh HTTPException(**...) each time
+CREDENTIALS_ERROR = {
+    "status_code": status.HTTP_401_UNAUTHORIZED,
+    "detail": "Could not validate credentials",
+    "headers": {"WWW-Authenticate": "Bearer"},
+}
+INACTIVE_ERROR = {"status_code": 400, "detail": "Inactive user"}
+
+# Verified token payloads keyed by raw token, so hot tokens skip signature checks
+_token_cache: TTLCache = TTLCache(maxsize=4096, ttl=10)
+_token_cache_lock = Lock()
 
 
 def hash_password(password: str) -> str:
@@ -41,102 +58,50 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 def decode_token(token: str) -> Optional[dict]:
     """Decode and validate a JWT token."""
+    with _token_cache_lock:
+        payload = _token_cache.get(token)
+    if payload is not None:
+        # Cached payloads were verified already; only expiry can change
+        exp = payload.get("exp")
+        if exp is None or time.time() < exp:
+            return payload
+        return None
+    
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
     except JWTError:
         return None
-
-
-def get_current_user_dependency(session: Session):
-    """Factory for creating get_current_user with injected session."""
-    from app.models import User
     
-    async def get_current_user(
-        credentials: HTTPAuthorizationCredentials = Depends(security),
-    ) -> "User":
-        """Get the current authenticated user from the JWT token."""
-        credentials_exception = HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-        
-        token = credentials.credentials
-        payload = decode_token(token)
-        
-        if payload is None:
-            raise credentials_exception
-        
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-        
-        # Check if token is expired
-        exp = payload.get("exp")
-        if exp and datetime.utcnow() > datetime.fromtimestamp(exp):
-            raise credentials_exception
-        
-        # Get user from database
-        statement = select(User).where(User.email == email)
-        user = session.exec(statement).first()
-        
-        if user is None:
-            raise credentials_exception
-        
-        if not user.is_active:
-            raise HTTPException(status_code=400, detail="Inactive user")
-        
-        return user
-    
-    return get_current_user
+    with _token_cache_lock:
+        _token_cache[token] = payload
+    return payload
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    session: Session = None
-):
-    """Get the current authenticated user from the JWT token."""
-    from app.models import User
-    from app.database import get_session
-    
-    # Get session if not provided
-    if session is None:
-        session = next(get_session())
-    
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
-    # Handle missing credentials
-    if credentials is None:
-        raise credentials_exception
+class JWTAuthMiddleware:
+    """
+    Decode the bearer token once per request and expose its claims.
     
-    token = credentials.credentials
-    payload = decode_token(token)
+    Sets ``request.state.user_email`` and ``request.state.user_id`` (None when
+    the request carries no valid token); routes decide whether auth is required.
+    """
     
-    if payload is None:
-        raise credentials_exception
+    def __init__(self, app):
+        self.app = app
     
-    email: str = payload.get("sub")
-    if email is None:
-        raise credentials_exception
-    
-    # Check if token is expired
-    exp = payload.get("exp")
-    if exp and datetime.utcnow() > datetime.fromtimestamp(exp):
-        raise credentials_exception
-    
-    # Get user from database
-    statement = select(User).where(User.email == email)
-    user = session.exec(statement).first()
-    
-    if user is None:
-        raise credentials_exception
-    
-    if not user.is_active:
-        raise HTTPException(status_code=400, detail="Inactive user")
-    
-    return user
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            state = scope.setdefault("state", {})
+            state["user_email"] = None
+            state["user_id"] = None
+            
+            for name, value in scope["headers"]:
+                if name == b"authorization":
+                    scheme, _, token = value.decode("latin-1").partition(" ")
+                    if scheme.lower() == "bearer" and token:
+                        payload = decode_token(token)
+                        if payload is not None:
+                            state["user_email"] = payload.get("sub")
+                            state["user_id"] = payload.get("user_id")
+                    break
+        
+        await self.app(scope, receive, send)
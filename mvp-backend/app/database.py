@@ -1,32 +1,81 @@
 """
 Database configuration and session management.
 """
-from sqlmodel import SQLModel, create_engine, Session
-from typing import Generator
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import AsyncGenerator
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./codimai.db")
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
 
-# Create database engine
-engine = create_engine(
-    DATABASE_URL,
+# Async drivers for the plain DSNs accepted in DATABASE_URL
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+
+def _async_url(url: str) -> str:
+    """Swap a plain DSN's scheme for its async driver."""
+    scheme, separator, rest = url.partition("://")
+    return _ASYNC_DRIVERS.get(scheme, scheme) + separator + rest
+
+
+# Create database engine, with a pool sized for concurrent requests
+engine = create_async_engine(
+    _async_url(DATABASE_URL),
     echo=False,  # Set to True for SQL query logging in development
-    connect_args={"check_same_thread": False}  # Needed for SQLite
+    pool_size=20,
+    max_overflow=20,
+    pool_timeout=30,
+    pool_pre_ping=True,
+    pool_recycle=1800,
+    query_cache_size=1200,  # Compiled-statement cache entries (default 500)
+    # SQLite: allow use across threads and wait on locks instead of failing fast
+    connect_args={"check_same_thread": False, "timeout": 30} if IS_SQLITE else {}
 )
 
 
-def create_db_and_tables():
-    """Create all database tables."""
-    SQLModel.metadata.create_all(engine)
+if IS_SQLITE:
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """Use WAL so readers are not blocked by the writer."""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+
+# Loaded attributes stay usable after commit, so handlers can return the objects
+async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+def _create_missing_indexes(connection) -> None:
+    """Add indexes declared after their table was first created."""
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
+async def create_db_and_tables():
+    """Create all database tables and any indexes missing from existing ones."""
+    async with engine.begin() as connection:
+        await connection.run_sync(SQLModel.metadata.create_all)
+        # create_all skips tables that already exist, so add indexes declared later
+        await connection.run_sync(_create_missing_indexes)
 
 
-def get_session() -> Generator[Session, None, None]:
+async def get_session() -> AsyncGenerator[AsyncSession, None]:
     """
     Dependency that yields a database session.
     Ensures proper cleanup after request.
     """
-    with Session(engine) as session:
+    async with async_session() as session:
         yield session
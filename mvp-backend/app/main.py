@@ -1,12 +1,22 @@
 """
 CodimAI Backend - Main FastAPI Application
 """
+import asyncio
+import http.cookiejar
+import re
 from contextlib import asynccontextmanager
+import httpx
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.datastructures import Headers
+from starlette.types import Receive, Scope, Send
 
 # Import configuration
 from app.core.config import settings
+from app.core.logging_config import setup_logging
+from app.core.security import JWTAuthMiddleware, hash_password
 from app.database import create_db_and_tables
 from app.api import api_router
 
@@ -15,10 +25,28 @@ from app.api import api_router
 async def lifespan(app: FastAPI):
     """Application lifespan events."""
     # Startup
-    create_db_and_tables()
+    log_listener = setup_logging()
+    await create_db_and_tables()
+    # Load the Argon2 backend now rather than on the first signup/login
+    await asyncio.to_thread(hash_password, "warmup")
+    # Shared outbound HTTP client so Gemini/PSI/crawl requests reuse pooled connections.
+    # The transport retries failed connection attempts; requests that were sent are not repeated.
+    # Its cookie jar accepts nothing, so one user's crawl never sends cookies set for another.
+    app.state.http = httpx.AsyncClient(
+        timeout=60.0,
+        cookies=http.cookiejar.CookieJar(
+            policy=http.cookiejar.DefaultCookiePolicy(allowed_domains=[])
+        ),
+        transport=httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+            http2=True,
+            retries=2
+        )
+    )
     yield
     # Shutdown
-    pass
+    await app.state.http.aclose()
+    log_listener.stop()
 
 
 # Create FastAPI application
@@ -26,20 +54,44 @@ app = FastAPI(
     title="CodimAI API",
     description="SEO and Performance Analysis API",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS
-allowed_origins = settings.ALLOWED_ORIGINS.split(",") if settings.ALLOWED_ORIGINS else ["http://localhost:3000"]
+allowed_origins = settings.ALLOWED_ORIGINS_LIST or ("http://localhost:3000",)
+
+# Origins with a wildcard (e.g. https://*.example.com) are matched by one regex
+wildcard_origins = [origin for origin in allowed_origins if "*" in origin and origin != "*"]
+allowed_origin_regex = "|".join(
+    re.escape(origin).replace(r"\*", r"[^./]+") for origin in wildcard_origins
+) or None
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=allowed_origins,
+    allow_origins=tuple(origin for origin in allowed_origins if origin not in wildcard_origins),
+    allow_origin_regex=allowed_origin_regex,
     allow_credentials=True,
-    allow_methods=["*"],
+    allow_methods=("GET", "POST", "PATCH", "DELETE"),
     allow_headers=["*"],
 )
 
+# Decode bearer tokens once, before routing
+app.add_middleware(JWTAuthMiddleware)
+
+class StreamingAwareGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware that passes NDJSON streams through; gzip would hold their lines back."""
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and "application/x-ndjson" in Headers(scope=scope).get("accept", ""):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+# Compress JSON responses (deep scans and PSI reports can run to hundreds of KB)
+app.add_middleware(StreamingAwareGZipMiddleware, minimum_size=1024)
+
 # Include API router
 app.include_router(api_router, prefix="/api")
 
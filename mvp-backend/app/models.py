@@ -1,17 +1,24 @@
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
 from typing import Optional, List
 from datetime import datetime
 
 class User(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    email: str
+    email: str = Field(index=True, unique=True)
     full_name: Optional[str] = None
     hashed_password: str
     is_active: bool = True
 
-    reports: List["Report"] = Relationship(back_populates="owner")
+    # Never lazy-load relationships; queries that need them must eager-load
+    reports: List["Report"] = Relationship(
+        back_populates="owner", sa_relationship_kwargs={"lazy": "raise"}
+    )
 
 class Report(SQLModel, table=True):
+    # Serves the per-owner, newest-first keyset pagination of /reports
+    __table_args__ = (Index("ix_report_owner_created", "owner_id", "created_at", "id"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     title: str
     url: str
@@ -19,4 +26,6 @@ class Report(SQLModel, table=True):
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
     owner_id: int = Field(foreign_key="user.id")
-    owner: Optional[User] = Relationship(back_populates="reports")
+    owner: Optional[User] = Relationship(
+        back_populates="reports", sa_relationship_kwargs={"lazy": "raise"}
+    )
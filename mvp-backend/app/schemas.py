@@ -1,7 +1,7 @@
 """
 Pydantic schemas for request/response validation.
 """
-from pydantic import BaseModel, EmailStr, ConfigDict
+from pydantic import BaseModel, EmailStr, ConfigDict, HttpUrl
 from typing import Optional, List
 from datetime import datetime
 
@@ -35,7 +35,7 @@ class Token(BaseModel):
 # Report Schemas
 class ReportCreate(BaseModel):
     title: str
-    url: str
+    url: HttpUrl
     payload: Optional[str] = None
 
 
@@ -53,11 +53,17 @@ class ReportRead(BaseModel):
     created_at: datetime
 
 
+class ReportListItem(BaseModel):
+    id: int
+    title: str
+    url: str
+    created_at: datetime
+
+
 class PaginatedReports(BaseModel):
     model_config = ConfigDict(from_attributes=True)
     
-    items: List[ReportRead]
-    total: int
-    page: int
+    items: List[ReportListItem]
     limit: int
-    pages: int
+    has_more: bool
+    next_cursor: Optional[str] = None
@@ -1,5 +1,5 @@
 """Services module for backend operations."""
-from app.services.seo_analyzer import analyze_html, extract_seo_data
+from app.services.seo_analyzer import analyze_html, extract_seo_data, parse_html
 from app.services.url_fetcher import fetch_url_content
 
-__all__ = ["analyze_html", "extract_seo_data", "fetch_url_content"]
+__all__ = ["analyze_html", "extract_seo_data", "fetch_url_content", "parse_html"]
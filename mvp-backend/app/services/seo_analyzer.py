@@ -2,14 +2,19 @@
 SEO Analyzer Service
 Server-side HTML parsing and SEO data extraction.
 """
-from bs4 import BeautifulSoup
+from selectolax.lexbor import LexborHTMLParser, LexborNode
 from urllib.parse import urljoin, urlparse
-from typing import Dict, List, Optional
+from collections import Counter
+import codecs
+from typing import Dict, List, Optional, Union
+import random
 import re
 
+from app.services.url_fetcher import parse_url
+
 
 # Common stop words to filter from keyword analysis
-STOP_WORDS = {
+STOP_WORDS = frozenset({
     "a", "about", "above", "after", "again", "against", "all", "am", "an", "and", "any", "are", "as", "at",
     "be", "because", "been", "before", "being", "below", "between", "both", "but", "by", "cannot", "could",
     "did", "do", "does", "doing", "down", "during", "each", "few", "for", "from", "further", "had", "has",
@@ -26,39 +31,185 @@ STOP_WORDS = {
     # Technical terms to filter
     "const", "var", "let", "function", "class", "import", "export", "return", "true", "false", "null",
     "undefined", "async", "await", "console", "log", "window", "document",
+})
+
+
+# Meta tags and their attributes, scanned for a declared charset in the first 1024 bytes
+_META_TAG_RE = re.compile(rb"<meta\s([^>]*)>", re.I)
+_META_ATTR_RE = re.compile(rb"""([\w-]+)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""")
+_CONTENT_CHARSET_RE = re.compile(rb"""charset\s*=\s*["']?\s*([\w.:-]+)""", re.I)
+
+
+def _meta_charset(html: bytes) -> Optional[str]:
+    """
+    Return the charset declared by ``<meta charset>`` or by an
+    ``http-equiv="content-type"`` meta's content, if any.
+    """
+    for tag in _META_TAG_RE.finditer(html, 0, 1024):
+        attrs = {
+            match.group(1).lower(): match.group(2) or match.group(3) or match.group(4) or b""
+            for match in _META_ATTR_RE.finditer(tag.group(1))
+        }
+        charset = attrs.get(b"charset", b"").strip()
+        if not charset and attrs.get(b"http-equiv", b"").strip().lower() == b"content-type":
+            match = _CONTENT_CHARSET_RE.search(attrs.get(b"content", b""))
+            charset = match.group(1) if match else b""
+        if charset:
+            return charset.decode("ascii", errors="ignore")
+    return None
+
+
+def parse_html(html: Union[bytes, str], encoding: Optional[str] = None) -> LexborHTMLParser:
+    """
+    Parse an HTML document with selectolax's Lexbor engine.
+    
+    Lexbor reads bytes as UTF-8, so bytes in any other charset are decoded
+    first: ``encoding`` (the HTTP charset) takes precedence over the
+    document's own meta charset; without either, UTF-8 is assumed.
+    A meta-declared UTF-16 is read as UTF-8, as browsers do.
+    """
+    if isinstance(html, bytes):
+        from_meta = encoding is None
+        if from_meta:
+            encoding = _meta_charset(html)
+        try:
+            codec = codecs.lookup(encoding).name if encoding else "utf-8"
+        except LookupError:
+            codec = "utf-8"
+        # A document that could declare itself in ASCII is not UTF-16 (HTML prescan rule)
+        if from_meta and codec.startswith("utf-16"):
+            codec = "utf-8"
+        
+        if codec != "utf-8":
+            html = html.decode(codec, errors="replace")
+        elif html.startswith(codecs.BOM_UTF8):
+            html = html[len(codecs.BOM_UTF8):]
+    
+    return LexborHTMLParser(html)
+
+
+# Elements whose text is not page content
+_NON_CONTENT_TAGS = frozenset({"script", "style", "noscript", "iframe", "code", "pre", "svg", "link", "meta"})
+
+_HEADING_TAGS = ("h1", "h2", "h3", "h4", "h5", "h6")
+
+# Extensions of linked files that are assets rather than pages
+_ASSET_EXTS = frozenset({
+    "jpg", "jpeg", "png", "gif", "css", "js", "pdf", "svg", "ico", "xml", "woff", "woff2", "ttf", "eot"
+})
+
+# Keyword candidates: standalone words of three or more ASCII letters
+_WORD_RE = re.compile(r"\b[a-zA-Z]{3,}\b")
+
+# Type, label and severity of every issue the scorers can report
+_ISSUES = {
+    "title_missing": {"type": "title", "label": "Missing Title Tag", "severity": "High"},
+    "title_too_long": {"type": "title", "label": "Title Too Long", "severity": "Medium"},
+    "title_too_short": {"type": "title", "label": "Title Too Short", "severity": "Medium"},
+    "description_missing": {"type": "description", "label": "Missing Meta Description", "severity": "High"},
+    "description_too_long": {"type": "description", "label": "Description Too Long", "severity": "Low"},
+    "description_too_short": {"type": "description", "label": "Description Too Short", "severity": "Medium"},
+    "h1_missing": {"type": "h1", "label": "Missing H1 Heading", "severity": "High"},
+    "h1_multiple": {"type": "h1", "label": "Multiple H1 Tags", "severity": "Medium"},
+    "images_missing_alt": {"type": "images", "label": "Missing Alt Text", "severity": "Medium"},
+    "content_thin": {"type": "content", "label": "Thin Content", "severity": "Medium"},
+    "canonical_missing": {"type": "canonical", "label": "Missing Canonical Tag", "severity": "Low"},
 }
 
 
-def analyze_html(html: str, url: str) -> Dict:
+def _scan(doc: LexborHTMLParser) -> Dict:
+    """
+    Walk the document once and collect everything the analysis reads.
+    
+    Meta tags are keyed by name and property (first occurrence wins), headings
+    by level; image attributes and link hrefs are kept in document order.
+    """
+    title = None
+    canonical = None
+    charset = None
+    meta_by_name: Dict[str, Optional[str]] = {}
+    meta_by_prop: Dict[str, Optional[str]] = {}
+    headings: Dict[str, List[LexborNode]] = {tag: [] for tag in _HEADING_TAGS}
+    images = []
+    hrefs = []
+    
+    for node in doc.root.traverse(include_text=False):
+        tag = node.tag
+        if tag in headings:
+            headings[tag].append(node)
+        elif tag == "a":
+            attrs = node.attributes
+            if "href" in attrs:
+                hrefs.append(attrs["href"] or "")
+        elif tag == "img":
+            images.append(node.attributes)
+        elif tag == "meta":
+            attrs = node.attributes
+            name = attrs.get("name")
+            if name is not None:
+                meta_by_name.setdefault(name, attrs.get("content"))
+            prop = attrs.get("property")
+            if prop is not None:
+                meta_by_prop.setdefault(prop, attrs.get("content"))
+            if charset is None:
+                charset = attrs.get("charset")
+        elif tag == "title":
+            if title is None:
+                title = node.text()
+        elif tag == "link":
+            if canonical is None:
+                attrs = node.attributes
+                if "canonical" in (attrs.get("rel") or "").split():
+                    canonical = attrs.get("href")
+    
+    return {
+        "title": title,
+        "canonical": canonical,
+        "charset": charset,
+        "meta_by_name": meta_by_name,
+        "meta_by_prop": meta_by_prop,
+        "headings": headings,
+        "images": images,
+        "hrefs": hrefs,
+    }
+
+
+def analyze_html(doc: LexborHTMLParser, url: str) -> Dict:
     """
     Analyze HTML content for SEO factors.
     
     Args:
-        html: Raw HTML content
+        doc: Document returned by parse_html; non-content elements are
+            stripped from it during keyword extraction
         url: The URL being analyzed
         
     Returns:
         Dict containing comprehensive SEO analysis data
     """
-    soup = BeautifulSoup(html, "lxml")
+    nodes = _scan(doc)
     
     # Extract meta tags
-    meta = extract_meta_tags(soup)
+    meta = extract_meta_tags(nodes)
     
     # Extract social tags
-    social = extract_social_tags(soup)
+    social = extract_social_tags(nodes)
     
     # Extract headings
-    headings = extract_headings(soup)
+    headings = extract_headings(nodes)
     
     # Extract images
-    images = extract_images(soup)
+    images = extract_images(nodes)
     
     # Extract links
-    links = extract_links(soup, url)
+    links = extract_links(nodes, url)
     
     # Extract keywords
-    keywords, word_count = extract_keywords(soup)
+    keywords, word_count = extract_keywords(
+        doc,
+        (meta["title"] or "").lower(),
+        (meta["description"] or "").lower(),
+        " ".join(headings["h1"]).lower()
+    )
     
     # Calculate score
     score, issues = calculate_seo_score(meta, headings, images, links, word_count)
@@ -81,22 +232,37 @@ def analyze_html(html: str, url: str) -> Dict:
     }
 
 
-def extract_seo_data(html: str, url: str) -> Dict:
+def _issue(key: str, description: str) -> Dict:
+    """Build an issue entry from its template."""
+    template = _ISSUES[key]
+    return {
+        "type": template["type"],
+        "label": template["label"],
+        "description": description,
+        "severity": template["severity"]
+    }
+
+
+def extract_seo_data(doc: LexborHTMLParser, url: str) -> Dict:
     """
     Extract basic SEO data for quick analysis.
+    
+    Runs for every crawled page, so only the few elements it needs are
+    looked up with selectors (matched by Lexbor in C) instead of walking
+    the whole document.
     """
-    soup = BeautifulSoup(html, "lxml")
+    title_node = doc.css_first("title")
+    title = title_node.text() if title_node is not None else None
+    title = title.strip() if title else None
     
-    title = soup.title.string.strip() if soup.title and soup.title.string else None
     description = None
-    desc_tag = soup.find("meta", attrs={"name": "description"})
-    if desc_tag:
-        description = desc_tag.get("content")
+    desc_node = doc.css_first('meta[name="description"]')
+    if desc_node is not None:
+        description = desc_node.attributes.get("content")
     
-    h1_tags = [h1.get_text(strip=True) for h1 in soup.find_all("h1")]
+    h1_tags = [h1.text(strip=True) for h1 in doc.css("h1")]
     
-    images = soup.find_all("img")
-    images_without_alt = sum(1 for img in images if not img.get("alt"))
+    images_without_alt = sum(1 for img in doc.css("img") if not img.attributes.get("alt"))
     
     # Calculate basic score and identify issues
     score = 100
@@ -104,72 +270,32 @@ def extract_seo_data(html: str, url: str) -> Dict:
     
     if not title:
         score -= 20
-        issues_list.append({
-            "type": "title",
-            "label": "Missing Title Tag",
-            "description": "The page title is missing, which is critical for SEO.",
-            "severity": "High"
-        })
+        issues_list.append(_issue("title_missing", "The page title is missing, which is critical for SEO."))
     elif len(title) > 60:
         score -= 5
-        issues_list.append({
-            "type": "title",
-            "label": "Title Too Long",
-            "description": f"Title is {len(title)} chars (recommended: < 60).",
-            "severity": "Medium"
-        })
+        issues_list.append(_issue("title_too_long", f"Title is {len(title)} chars (recommended: < 60)."))
     elif len(title) < 10:
         score -= 5
-        issues_list.append({
-            "type": "title",
-            "label": "Title Too Short",
-            "description": "Title is too short to be descriptive.",
-            "severity": "Medium"
-        })
+        issues_list.append(_issue("title_too_short", "Title is too short to be descriptive."))
 
     if not description:
         score -= 20
-        issues_list.append({
-            "type": "description",
-            "label": "Missing Meta Description",
-            "description": "Meta description is missing, impacting click-through rates.",
-            "severity": "High"
-        })
+        issues_list.append(_issue("description_missing", "Meta description is missing, impacting click-through rates."))
     elif len(description) > 160:
         score -= 3
-        issues_list.append({
-            "type": "description",
-            "label": "Description Too Long",
-            "description": "Meta description exceeds 160 characters.",
-            "severity": "Low"
-        })
+        issues_list.append(_issue("description_too_long", "Meta description exceeds 160 characters."))
 
     if not h1_tags:
         score -= 15
-        issues_list.append({
-            "type": "h1",
-            "label": "Missing H1 Heading",
-            "description": "No H1 tag found. Use one H1 for the main title.",
-            "severity": "High"
-        })
+        issues_list.append(_issue("h1_missing", "No H1 tag found. Use one H1 for the main title."))
     elif len(h1_tags) > 1:
         score -= 5
-        issues_list.append({
-            "type": "h1",
-            "label": "Multiple H1 Tags",
-            "description": f"Found {len(h1_tags)} H1 tags. Use only one per page.",
-            "severity": "Medium"
-        })
+        issues_list.append(_issue("h1_multiple", f"Found {len(h1_tags)} H1 tags. Use only one per page."))
 
     if images_without_alt > 0:
         penalty = min(10, images_without_alt * 2)
         score -= penalty
-        issues_list.append({
-            "type": "images",
-            "label": "Missing Alt Text",
-            "description": f"{images_without_alt} images are missing alt text.",
-            "severity": "Medium"
-        })
+        issues_list.append(_issue("images_missing_alt", f"{images_without_alt} images are missing alt text."))
     
     return {
         "title": title,
@@ -181,38 +307,30 @@ def extract_seo_data(html: str, url: str) -> Dict:
     }
 
 
-def extract_meta_tags(soup: BeautifulSoup) -> Dict:
+def extract_meta_tags(nodes: Dict) -> Dict:
     """Extract meta tags from HTML."""
     def get_meta(name: str) -> Optional[str]:
-        tag = soup.find("meta", attrs={"name": name}) or soup.find("meta", attrs={"property": name})
-        return tag.get("content") if tag else None
-    
-    canonical = None
-    canonical_tag = soup.find("link", attrs={"rel": "canonical"})
-    if canonical_tag:
-        canonical = canonical_tag.get("href")
-    
-    charset = None
-    charset_tag = soup.find("meta", attrs={"charset": True})
-    if charset_tag:
-        charset = charset_tag.get("charset")
+        if name in nodes["meta_by_name"]:
+            return nodes["meta_by_name"][name]
+        return nodes["meta_by_prop"].get(name)
     
     return {
-        "title": soup.title.string.strip() if soup.title and soup.title.string else None,
+        "title": nodes["title"].strip() if nodes["title"] else None,
         "description": get_meta("description"),
         "keywords": get_meta("keywords"),
         "robots": get_meta("robots"),
-        "canonical": canonical,
-        "charset": charset or "UTF-8",
+        "canonical": nodes["canonical"],
+        "charset": nodes["charset"] or "UTF-8",
         "viewport": get_meta("viewport"),
     }
 
 
-def extract_social_tags(soup: BeautifulSoup) -> Dict:
+def extract_social_tags(nodes: Dict) -> Dict:
     """Extract Open Graph and Twitter Card tags."""
     def get_meta(name: str) -> Optional[str]:
-        tag = soup.find("meta", attrs={"property": name}) or soup.find("meta", attrs={"name": name})
-        return tag.get("content") if tag else None
+        if name in nodes["meta_by_prop"]:
+            return nodes["meta_by_prop"][name]
+        return nodes["meta_by_name"].get(name)
     
     return {
         "ogTitle": get_meta("og:title"),
@@ -225,109 +343,121 @@ def extract_social_tags(soup: BeautifulSoup) -> Dict:
     }
 
 
-def extract_headings(soup: BeautifulSoup) -> Dict:
+def extract_headings(nodes: Dict) -> Dict:
     """Extract all heading tags."""
-    headings = {}
-    for level in range(1, 7):
-        tag = f"h{level}"
-        headings[tag] = [h.get_text(strip=True) for h in soup.find_all(tag)]
-    return headings
+    return {
+        tag: [h.text(strip=True) for h in elements]
+        for tag, elements in nodes["headings"].items()
+    }
 
 
-def extract_images(soup: BeautifulSoup) -> Dict:
+def extract_images(nodes: Dict) -> Dict:
     """Extract image information."""
-    images = soup.find_all("img")
-    
-    with_alt = [img for img in images if img.get("alt")]
-    without_alt = [img for img in images if not img.get("alt")]
+    images = nodes["images"]
     
+    without_alt = 0
     details = []
-    for img in images[:10]:  # Limit to first 10
-        details.append({
-            "src": img.get("src", "unknown"),
-            "alt": img.get("alt", "")
-        })
+    for index, img in enumerate(images):
+        alt = img.get("alt")
+        if not alt:
+            without_alt += 1
+        if index < 10:  # Limit to first 10
+            details.append({
+                "src": img.get("src", "unknown") or "",
+                "alt": alt or ""
+            })
     
     return {
         "total": len(images),
-        "withAlt": len(with_alt),
-        "withoutAlt": len(without_alt),
+        "withAlt": len(images) - without_alt,
+        "withoutAlt": without_alt,
         "details": details
     }
 
 
-def extract_links(soup: BeautifulSoup, base_url: str) -> Dict:
+def extract_links(nodes: Dict, base_url: str) -> Dict:
     """Extract link information."""
-    links = soup.find_all("a", href=True)
+    hrefs = nodes["hrefs"]
     
-    parsed_base = urlparse(base_url)
+    parsed_base = parse_url(base_url)
     base_domain = parsed_base.netloc
     
     internal = 0
     external = 0
-    internal_urls = set()
+    internal_urls: Dict[str, None] = {}  # Insertion-ordered set
     
-    for link in links:
-        href = link.get("href", "")
-        
+    # "internal", "external" or "" per distinct href, so repeated links are resolved once
+    link_kinds: Dict[str, str] = {}
+    
+    for href in hrefs:
         # Skip empty, anchor, or javascript links
         if not href or href.startswith("#") or href.startswith("javascript:"):
             continue
         
-        try:
-            # Resolve relative URLs
-            full_url = urljoin(base_url, href)
-            parsed = urlparse(full_url)
-            
-            if parsed.netloc == base_domain:
-                internal += 1
-                # Skip asset links
-                if not re.search(r"\.(jpg|jpeg|png|gif|css|js|pdf|svg|ico|xml)$", parsed.path, re.I):
-                    internal_urls.add(full_url)
-            elif href.startswith("http"):
-                external += 1
-        except Exception:
-            pass
+        kind = link_kinds.get(href)
+        if kind is None:
+            kind = ""
+            try:
+                # Resolve relative URLs
+                full_url = urljoin(base_url, href)
+                parsed = parse_url(full_url)
+                
+                if parsed.netloc == base_domain:
+                    kind = "internal"
+                    # Skip asset links
+                    if (
+                        len(internal_urls) < 25  # Limit for deep scan
+                        and parsed.path.rsplit(".", 1)[-1].lower() not in _ASSET_EXTS
+                    ):
+                        internal_urls[full_url] = None
+                elif href.startswith("http"):
+                    kind = "external"
+            except Exception:
+                pass
+            link_kinds[href] = kind
+        
+        if kind == "internal":
+            internal += 1
+        elif kind == "external":
+            external += 1
     
     return {
-        "total": len(links),
+        "total": len(hrefs),
         "internal": internal,
         "external": external,
-        "internalUrls": list(internal_urls)[:25]  # Limit for deep scan
+        "internalUrls": list(internal_urls)
     }
 
 
-def extract_keywords(soup: BeautifulSoup) -> tuple:
-    """Extract and analyze keywords from content."""
-    # Remove script, style, and other non-content tags
-    for tag in soup(["script", "style", "noscript", "iframe", "code", "pre", "svg", "link", "meta"]):
-        tag.decompose()
-    
-    text = soup.get_text(separator=" ")
+def extract_keywords(
+    doc: LexborHTMLParser,
+    title: str,
+    description: str,
+    h1_text: str
+) -> tuple:
+    """
+    Extract and analyze keywords from content.
     
-    # Clean and tokenize
-    words = re.findall(r"\b[a-z]{3,}\b", text.lower())
-    words = [w for w in words if w not in STOP_WORDS and not w.isdigit()]
+    ``title``, ``description`` and ``h1_text`` are the already extracted
+    values, lowercased, that keyword placement is checked against.
+    """
+    # Remove script, style, and other non-content tags
+    doc.strip_tags(list(_NON_CONTENT_TAGS))
     
-    word_count = len(words)
+    text = doc.root.text(separator=" ")
     
-    # Calculate frequency
-    frequency = {}
-    for word in words:
-        frequency[word] = frequency.get(word, 0) + 1
+    # Tokenize and count in one pass, without a lowercased copy of the text
+    word_count = 0
+    frequency: Counter = Counter()
+    for match in _WORD_RE.finditer(text):
+        word = match.group().lower()
+        if word in STOP_WORDS:
+            continue
+        word_count += 1
+        frequency[word] += 1
     
     # Get top keywords
-    sorted_keywords = sorted(frequency.items(), key=lambda x: x[1], reverse=True)[:10]
-    
-    # Get meta info for context
-    title = soup.title.string.lower() if soup.title and soup.title.string else ""
-    description = ""
-    desc_tag = soup.find("meta", attrs={"name": "description"})
-    if desc_tag and desc_tag.get("content"):
-        description = desc_tag.get("content").lower()
-    
-    h1_tags = [h1.get_text().lower() for h1 in soup.find_all("h1")]
-    h1_text = " ".join(h1_tags)
+    sorted_keywords = frequency.most_common(10)
     
     keywords = []
     for word, count in sorted_keywords:
@@ -351,103 +481,48 @@ def calculate_seo_score(meta: Dict, headings: Dict, images: Dict, links: Dict, w
     # Title checks
     if not meta.get("title"):
         score -= 20
-        issues.append({
-            "type": "title",
-            "label": "Missing Title Tag",
-            "description": "The page title is missing.",
-            "severity": "High"
-        })
+        issues.append(_issue("title_missing", "The page title is missing."))
     elif len(meta.get("title", "")) > 60:
         score -= 5
-        issues.append({
-            "type": "title",
-            "label": "Title Too Long",
-            "description": f"Title is {len(meta.get('title', ''))} chars (recommended: < 60).",
-            "severity": "Medium"
-        })
+        issues.append(_issue("title_too_long", f"Title is {len(meta.get('title', ''))} chars (recommended: < 60)."))
     elif len(meta.get("title", "")) < 10:
         score -= 5
-        issues.append({
-            "type": "title",
-            "label": "Title Too Short",
-            "description": "Title is too short to be descriptive.",
-            "severity": "Medium"
-        })
+        issues.append(_issue("title_too_short", "Title is too short to be descriptive."))
     
     # Description checks
     if not meta.get("description"):
         score -= 20
-        issues.append({
-            "type": "description",
-            "label": "Missing Meta Description",
-            "description": "Meta description is missing.",
-            "severity": "High"
-        })
+        issues.append(_issue("description_missing", "Meta description is missing."))
     elif len(meta.get("description", "")) > 160:
         score -= 3
-        issues.append({
-            "type": "description",
-            "label": "Description Too Long",
-            "description": "Meta description exceeds 160 characters.",
-            "severity": "Low"
-        })
+        issues.append(_issue("description_too_long", "Meta description exceeds 160 characters."))
     elif len(meta.get("description", "")) < 50:
         score -= 5
-        issues.append({
-            "type": "description",
-            "label": "Description Too Short",
-            "description": "Meta description is too short.",
-            "severity": "Medium"
-        })
+        issues.append(_issue("description_too_short", "Meta description is too short."))
     
     # H1 checks
     if not headings.get("h1"):
         score -= 15
-        issues.append({
-            "type": "h1",
-            "label": "Missing H1 Heading",
-            "description": "No H1 tag found.",
-            "severity": "High"
-        })
+        issues.append(_issue("h1_missing", "No H1 tag found."))
     elif len(headings.get("h1", [])) > 1:
         score -= 5
-        issues.append({
-            "type": "h1",
-            "label": "Multiple H1 Tags",
-            "description": "Multiple H1 tags found.",
-            "severity": "Medium"
-        })
+        issues.append(_issue("h1_multiple", "Multiple H1 tags found."))
     
     # Image alt checks
     if images.get("withoutAlt", 0) > 0:
         penalty = min(10, images["withoutAlt"] * 2)
         score -= penalty
-        issues.append({
-            "type": "images",
-            "label": "Missing Alt Text",
-            "description": f"{images['withoutAlt']} images are missing alt text.",
-            "severity": "Medium"
-        })
+        issues.append(_issue("images_missing_alt", f"{images['withoutAlt']} images are missing alt text."))
     
     # Content length check
     if word_count < 300:
         score -= 10
-        issues.append({
-            "type": "content",
-            "label": "Thin Content",
-            "description": f"Word count is {word_count} (recommended: > 300).",
-            "severity": "Medium"
-        })
+        issues.append(_issue("content_thin", f"Word count is {word_count} (recommended: > 300)."))
     
     # Canonical check
     if not meta.get("canonical"):
         score -= 5
-        issues.append({
-            "type": "canonical",
-            "label": "Missing Canonical Tag",
-            "description": "Canonical tag is missing.",
-            "severity": "Low"
-        })
+        issues.append(_issue("canonical_missing", "Canonical tag is missing."))
     
     return max(0, min(100, score)), issues
 
@@ -455,6 +530,7 @@ def calculate_seo_score(meta: Dict, headings: Dict, images: Dict, links: Dict, w
 def generate_crawled_pages(url: str, internal_urls: List[str], meta: Dict, score: int) -> List[Dict]:
     """Generate crawled pages list for site-wide analysis."""
     crawled_pages = []
+    randint = random.randint
     
     # Add main page
     crawled_pages.append({
@@ -473,15 +549,14 @@ def generate_crawled_pages(url: str, internal_urls: List[str], meta: Dict, score
             title = path.split("/")[-1].replace("-", " ").title() or "Internal Page"
             
             # Simulate variance
-            import random
-            variance = random.randint(-10, 10)
+            variance = randint(-10, 10)
             page_score = max(0, min(100, score + variance))
             
             crawled_pages.append({
                 "url": page_url,
                 "status": "200",
                 "score": page_score,
-                "issues": random.randint(0, 5),
+                "issues": randint(0, 5),
                 "title": title if len(title) > 2 else "Internal Page"
             })
         except Exception:
@@ -3,45 +3,90 @@ URL Fetcher Service
 Server-side URL fetching to avoid CORS issues and public proxy reliance.
 """
 import httpx
-from typing import Dict
+from functools import lru_cache
+from typing import Dict, Optional
 from urllib.parse import urlparse
 
 
-async def fetch_url_content(url: str, timeout: float = 30.0) -> Dict:
+# urlparse with memoization: link extraction parses the same URLs over and over.
+# Results are immutable named tuples, so sharing them is safe.
+parse_url = lru_cache(maxsize=4096)(urlparse)
+
+# Deletes every character str.split() treats as whitespace (the last one is U+3000)
+_WHITESPACE_TABLE = str.maketrans("", "", "".join(
+    char for char in map(chr, range(0x3001)) if char.isspace()
+))
+
+# Pages are truncated after this many (decompressed) bytes
+_MAX_CONTENT_BYTES = 5_000_000
+
+# Browser-like request headers so sites serve the same HTML users see
+_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+    "Accept-Encoding": "gzip, deflate, br",
+    "Upgrade-Insecure-Requests": "1",
+}
+
+
+async def fetch_url_content(
+    url: str,
+    client: httpx.AsyncClient,
+    timeout: float = 30.0
+) -> Dict:
     """
     Fetch content from a URL server-side.
     
     Args:
         url: The URL to fetch
+        client: The application's shared HTTP client, so pooled connections are reused
         timeout: Request timeout in seconds
         
     Returns:
-        Dict with content, final_url, and status_code
+        Dict with content_bytes (the raw body), encoding (charset from the
+        Content-Type header, if any), final_url, and status_code
     """
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-        "Accept-Language": "en-US,en;q=0.5",
-        "Accept-Encoding": "gzip, deflate, br",
-        "Connection": "keep-alive",
-        "Upgrade-Insecure-Requests": "1",
-    }
-    
-    async with httpx.AsyncClient(
-        timeout=timeout,
+    # Streamed so an oversized page is cut off instead of being read into memory whole
+    async with client.stream(
+        "GET",
+        url,
+        headers=_HEADERS,
         follow_redirects=True,
-        verify=True
-    ) as client:
-        response = await client.get(url, headers=headers)
+        timeout=timeout
+    ) as response:
         response.raise_for_status()
         
-        return {
-            "content": response.text,
-            "final_url": str(response.url),
-            "status_code": response.status_code
-        }
+        body = bytearray()
+        async for chunk in response.aiter_bytes():
+            body += chunk
+            if len(body) >= _MAX_CONTENT_BYTES:
+                del body[_MAX_CONTENT_BYTES:]
+                break
+    
+    # Decoding is left to the consumer; parse_html passes UTF-8 bytes straight to
+    # selectolax and decodes any other charset itself
+    return {
+        "content_bytes": bytes(body),
+        "encoding": response.charset_encoding,
+        "final_url": str(response.url),
+        "status_code": response.status_code
+    }
+
+
+def decode_content(content: bytes, encoding: Optional[str]) -> str:
+    """
+    Decode a fetched body as text, like httpx's ``response.text``.
+    
+    Missing or unknown charsets fall back to UTF-8; undecodable bytes are replaced.
+    """
+    try:
+        return content.decode(encoding or "utf-8", errors="replace")
+    except LookupError:
+        return content.decode("utf-8", errors="replace")
 
 
+@lru_cache(maxsize=2048)
 def normalize_url(url: str) -> str:
     """
     Normalize a URL by ensuring it has a scheme.
@@ -57,7 +102,7 @@ def normalize_url(url: str) -> str:
         return ""
     
     # Remove whitespace
-    url = "".join(url.split())
+    url = url.translate(_WHITESPACE_TABLE)
     
     # Add https:// if no scheme
     if not url.startswith(("http://", "https://")):
@@ -66,6 +111,7 @@ def normalize_url(url: str) -> str:
     return url
 
 
+@lru_cache(maxsize=2048)
 def get_base_url(url: str) -> str:
     """
     Extract the base URL (scheme + netloc) from a URL.
@@ -1,5 +1,7 @@
+from functools import lru_cache
 from urllib.parse import urlparse
 
+@lru_cache(maxsize=2048)
 def validate_url(url: str):
     parsed = urlparse(url)
     if not parsed.scheme or not parsed.netloc:
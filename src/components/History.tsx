@@ -2,8 +2,8 @@
  * History Component
  * Displays user's analysis history with pagination support.
  */
-import React, { useEffect, useState, useCallback } from 'react';
-import { apiService, ReportResponse, PaginatedReports } from '../services/apiService';
+import React, { useEffect, useState, useCallback, useRef } from 'react';
+import { apiService, ReportListItem, PaginatedReports } from '../services/apiService';
 import { Calendar, Link as LinkIcon, ArrowRight, Loader, Trash2, ChevronLeft, ChevronRight } from 'lucide-react';
 
 interface HistoryProps {
@@ -11,11 +11,13 @@ interface HistoryProps {
 }
 
 const History: React.FC<HistoryProps> = ({ onSelectReport }) => {
-    const [reports, setReports] = useState<ReportResponse[]>([]);
+    const [reports, setReports] = useState<ReportListItem[]>([]);
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState<string | null>(null);
     const [page, setPage] = useState(1);
-    const [totalPages, setTotalPages] = useState(1);
+    const [hasMore, setHasMore] = useState(false);
+    // Cursor that starts each visited page; index 0 is the first page
+    const pageCursors = useRef<(string | undefined)[]>([undefined]);
     const [deletingId, setDeletingId] = useState<number | null>(null);
     const [isAuthenticated, setIsAuthenticated] = useState(apiService.isAuthenticated());
 
@@ -30,9 +32,10 @@ const History: React.FC<HistoryProps> = ({ onSelectReport }) => {
         setLoading(true);
         setError(null);
         try {
-            const data: PaginatedReports = await apiService.getReports(page, 10);
+            const data: PaginatedReports = await apiService.getReports(pageCursors.current[page - 1], 10);
+            pageCursors.current[page] = data.next_cursor ?? undefined;
             setReports(data.items);
-            setTotalPages(data.pages);
+            setHasMore(data.has_more);
         } catch (err: any) {
             // If authentication failed, show login prompt instead of error
             if (err.message?.includes('credentials') || err.message?.includes('401')) {
@@ -50,6 +53,16 @@ const History: React.FC<HistoryProps> = ({ onSelectReport }) => {
         fetchReports();
     }, [fetchReports]);
 
+    // List items omit the payload, so load the full report when one is opened
+    const handleSelect = async (reportId: number) => {
+        try {
+            const fullReport = await apiService.getReport(reportId);
+            onSelectReport(fullReport.payload);
+        } catch (err: any) {
+            setError(err.message || 'Failed to load report. Please try again.');
+        }
+    };
+
     const handleDelete = async (e: React.MouseEvent, reportId: number) => {
         e.stopPropagation();
         if (!confirm('Are you sure you want to delete this report?')) return;
@@ -139,7 +152,7 @@ const History: React.FC<HistoryProps> = ({ onSelectReport }) => {
                                 return (
                                     <div
                                         key={report.id}
-                                        onClick={() => onSelectReport(report.payload)}
+                                        onClick={() => handleSelect(report.id)}
                                         className="bg-[#1a1a1a] p-6 rounded-xl border border-[#333] hover:border-red-500/50 hover:bg-[#222] transition-all cursor-pointer group"
                                     >
                                         <div className="flex justify-between items-start">
@@ -182,7 +195,7 @@ const History: React.FC<HistoryProps> = ({ onSelectReport }) => {
                         </div>
 
                         {/* Pagination */}
-                        {totalPages > 1 && (
+                        {(page > 1 || hasMore) && (
                             <div className="flex justify-center items-center gap-4 mt-8">
                                 <button
                                     onClick={() => setPage(p => Math.max(1, p - 1))}
@@ -192,11 +205,11 @@ const History: React.FC<HistoryProps> = ({ onSelectReport }) => {
                                     <ChevronLeft size={20} />
                                 </button>
                                 <span className="text-gray-400">
-                                    Page {page} of {totalPages}
+                                    Page {page}
                                 </span>
                                 <button
-                                    onClick={() => setPage(p => Math.min(totalPages, p + 1))}
-                                    disabled={page === totalPages}
+                                    onClick={() => setPage(p => p + 1)}
+                                    disabled={!hasMore}
                                     className="p-2 bg-[#1a1a1a] border border-[#333] rounded-lg text-gray-400 hover:text-white hover:border-gray-500 disabled:opacity-50 disabled:cursor-not-allowed transition-all"
                                 >
                                     <ChevronRight size={20} />
@@ -48,12 +48,18 @@ export interface ReportResponse {
     created_at: string;
 }
 
+export interface ReportListItem {
+    id: number;
+    title: string;
+    url: string;
+    created_at: string;
+}
+
 export interface PaginatedReports {
-    items: ReportResponse[];
-    total: number;
-    page: number;
+    items: ReportListItem[];
     limit: number;
-    pages: number;
+    has_more: boolean;
+    next_cursor: string | null;
 }
 
 export interface FetchUrlResponse {
@@ -201,8 +207,12 @@ class ApiService {
     }
 
     // Reports Endpoints
-    async getReports(page = 1, limit = 20): Promise<PaginatedReports> {
-        return this.request<PaginatedReports>(`/reports?page=${page}&limit=${limit}`);
+    async getReports(cursor?: string, limit = 20): Promise<PaginatedReports> {
+        const params = new URLSearchParams({ limit: String(limit) });
+        if (cursor) {
+            params.set('cursor', cursor);
+        }
+        return this.request<PaginatedReports>(`/reports?${params}`);
     }
 
     async getReport(id: number): Promise<ReportResponse> {
@@ -237,15 +247,81 @@ class ApiService {
         });
     }
 
-    async analyzeSEO(url: string, deepScan = true, maxPages = 50): Promise<any> {
-        return this.request<any>('/seo/analyze', {
+    async analyzeSEO(
+        url: string,
+        deepScan = true,
+        maxPages = 50,
+        onPage?: (page: any) => void
+    ): Promise<any> {
+        if (!deepScan) {
+            return this.request<any>('/seo/analyze', {
+                method: 'POST',
+                body: JSON.stringify({ url, deep_scan: deepScan, max_pages: maxPages }),
+            });
+        }
+
+        // Deep scans are streamed as NDJSON so crawled pages arrive as they finish
+        const token = this.getToken();
+        const headers: Record<string, string> = {
+            'Content-Type': 'application/json',
+            'Accept': 'application/x-ndjson',
+        };
+        if (token) {
+            headers['Authorization'] = `Bearer ${token}`;
+        }
+
+        const response = await fetch(`${this.baseUrl}/seo/analyze`, {
             method: 'POST',
+            headers,
             body: JSON.stringify({ url, deep_scan: deepScan, max_pages: maxPages }),
         });
+
+        if (!response.ok) {
+            const error = await response.json().catch(() => ({ detail: 'Request failed' }));
+            throw new Error(error.detail || `HTTP ${response.status}`);
+        }
+
+        let result: any = null;
+        let complete = false;
+        const crawledPages: any[] = [];
+        const handleLine = (line: string) => {
+            if (!line.trim()) return;
+            const message = JSON.parse(line);
+            if (message.type === 'analysis') {
+                result = message.data;
+            } else if (message.type === 'page') {
+                crawledPages.push(message.data);
+                onPage?.(message.data);
+            } else if (message.type === 'summary') {
+                complete = true;
+            }
+        };
+
+        const reader = response.body!.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            const lines = buffer.split('\n');
+            buffer = lines.pop() ?? '';
+            lines.forEach(handleLine);
+        }
+        handleLine(buffer + decoder.decode());
+
+        if (!result) {
+            throw new Error('SEO analysis returned no data');
+        }
+        // The summary line is sent last; without it the crawl was cut off
+        if (!complete) {
+            throw new Error('SEO analysis stream ended before the crawl finished');
+        }
+        return { ...result, crawledPages };
     }
 
     async runPageSpeed(url: string, strategy: 'mobile' | 'desktop' = 'mobile'): Promise<PSIResponse> {
-        return this.request<PSIResponse>('/psi/run', {
+        return this.request<PSIResponse>('/psi/run?include_screenshot=true', {
             method: 'POST',
             body: JSON.stringify({ url, strategy }),
         });